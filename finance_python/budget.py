@@ -1,15 +1,26 @@
 import pdy_to_data
 from budget_data import *
+from concurrent.futures import ProcessPoolExecutor
 from typing import Tuple
+import os
 import pandas
+from statement_cache import StatementCache, file_hash
 
+MONTHS = ["jan", "feb", "mar", "apr", "may", "jun", "jul", "aug", "sep", "oct", "nov", "dec"]
 
-def parsebudget(data, year) -> Tuple[list[BudgetEntry], Categories]:
+
+def parsebudget(
+    data, year, cache: CategoryCache | None = None
+) -> Tuple[list[BudgetEntry], Categories]:
     budgetArray: list[BudgetEntry] = []
     categories = Categories()
-    for line in data:
-        budget_entry = BudgetEntry(line, year)
-        category = categories.search(budget_entry.name)
+    entries = [BudgetEntry(line, year) for line in data]
+    names = [entry.name for entry in entries]
+    if cache is None:
+        matched = categories.search_batch(names)
+    else:
+        matched = cache.search_batch(categories, names)
+    for budget_entry, category in zip(entries, matched):
         budget_entry.assign_category(category)
         categories.addToTotal(budget_entry)
         budgetArray.append(budget_entry)
@@ -17,6 +28,49 @@ def parsebudget(data, year) -> Tuple[list[BudgetEntry], Categories]:
     return budgetArray, categories
 
 
+def statement_sort_key(filename: str) -> Tuple[int, int, str]:
+    """Sorts statement files like dec2024.pdf by year, then month, then name."""
+    stem = os.path.splitext(filename)[0]
+    month = stem[:3].lower()
+    month_index = MONTHS.index(month) + 1 if month in MONTHS else 0
+    return int(stem[-4:]), month_index, filename
+
+
+def read_statement(filepath: str) -> Tuple[list[dict], list[dict]]:
+    return pdy_to_data.read_pdf_into_dicts(filepath)
+
+
+def read_statements(
+    filepaths: list[str], workers: int
+) -> list[Tuple[list[dict], list[dict]]]:
+    """Extracts the transactions of every statement, in the order given.
+
+    With more than one worker the PDFs are read in a process pool, since text
+    extraction is where nearly all of the time goes.
+    """
+    if workers <= 1:
+        return [read_statement(filepath) for filepath in filepaths]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(read_statement, filepaths))
+
+
+def load_statements(
+    file_dir: str, filenames: list[str], workers: int, cache: StatementCache
+) -> list[list[dict]]:
+    """Returns the charges of every statement, reading only new or changed pdfs."""
+    hashes = [file_hash(os.path.join(file_dir, f)) for f in filenames]
+    statements = [cache.load(f, h) for f, h in zip(filenames, hashes)]
+    stale = [i for i, statement in enumerate(statements) if statement is None]
+    print(f"{len(filenames) - len(stale)} statements cached, {len(stale)} to read")
+
+    fresh = read_statements([os.path.join(file_dir, filenames[i]) for i in stale], workers)
+    for i, (charges, credits) in zip(stale, fresh):
+        cache.store(filenames[i], hashes[i], charges, credits)
+        statements[i] = (charges, credits)
+    cache.prune(filenames)
+    return [charges for charges, _ in statements]
+
+
 def combine_xlsx_files(filenames: list[str], output_filename: str) -> None:
     # create a workbook
     output_workbook = xlsxwriter.Workbook(output_filename)
@@ -47,22 +101,32 @@ def combine_xlsx_files(filenames: list[str], output_filename: str) -> None:
 
 
 if __name__ == "__main__":
-    import os
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Categorize credit card statements")
+    parser.add_argument(
+        "--workers", type=int, default=os.cpu_count() or 1,
+        help="processes used to read the statement pdfs (1 reads them one at a time)",
+    )
+    args = parser.parse_args()
 
     file_dir = "oldstatements/"
-    filenames = [
-        f for f in os.listdir(file_dir) if os.path.isfile(os.path.join(file_dir, f))
-    ]
+    filenames = sorted(
+        (f for f in os.listdir(file_dir) if os.path.isfile(os.path.join(file_dir, f))),
+        key=statement_sort_key,
+    )
 
     output_dir = "budget"
     excel_filenames = []
-    for filename in filenames:
-        filepath = file_dir + filename
-        (output, _) = pdy_to_data.read_pdf_into_dicts(filepath)
+    category_cache = CategoryCache()
+    statement_cache = StatementCache()
+    statements = load_statements(file_dir, filenames, args.workers, statement_cache)
+    statement_cache.close()
+    for filename, output in zip(filenames, statements):
         year_str = filename[:-4]
         year = int(year_str[-4:])
 
-        budget_arr, budget_categories = parsebudget(output, year)
+        budget_arr, budget_categories = parsebudget(output, year, category_cache)
 
         print("\n\n__________________Final Categorized Budget:__________________\n")
         file_path = os.path.join(output_dir, filename[:-4])
@@ -70,4 +134,7 @@ if __name__ == "__main__":
         budget_categories.print_to_excel(f"{file_path}.xlsx")
         excel_filenames.append(f"{os.path.join(output_dir, filename[:-4])}.xlsx")
 
+    category_cache.save()
+    print(category_cache.report())
+
     combine_xlsx_files(excel_filenames, "combinedBudget.xlsx")
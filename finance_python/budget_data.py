@@ -1,4 +1,7 @@
+from collections import deque
 from datetime import datetime
+import hashlib
+import json
 import xlsxwriter
 from typing import Tuple
 
@@ -317,6 +320,74 @@ class Category:
         return False, None
 
 
+class KeywordMatcher:
+    """Aho-Corasick automaton over every statement keyword of every category.
+
+    All keywords are compiled once into a trie with failure links, so a
+    transaction name is categorized in a single pass over its characters no
+    matter how many keywords there are. When several keywords occur in a
+    name the longest one wins; keywords of equal length are resolved by the
+    order of the categories, then of the keywords, in ``category_map_statement``.
+    """
+
+    def __init__(self, keyword_map: dict[str, list[str]]):
+        self.goto: list[dict[str, int]] = [{}]
+        self.fail: list[int] = [0]
+        # Best (length, -priority, category, keyword) ending at each node,
+        # including matches reached through failure links.
+        self.best: list[Tuple[int, int, str, str] | None] = [None]
+
+        priority = 0
+        for category_name, keywords in keyword_map.items():
+            for keyword in keywords:
+                node = 0
+                for char in keyword:
+                    if char not in self.goto[node]:
+                        self.goto.append({})
+                        self.fail.append(0)
+                        self.best.append(None)
+                        self.goto[node][char] = len(self.goto) - 1
+                    node = self.goto[node][char]
+                match = (len(keyword), -priority, category_name, keyword)
+                if self.best[node] is None or match[:2] > self.best[node][:2]:
+                    self.best[node] = match
+                priority += 1
+
+        # Breadth-first pass to set failure links and fold in inherited matches.
+        # Children of the root keep the root as their failure link.
+        queue = deque(self.goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self.goto[node].items():
+                queue.append(child)
+                fallback = self.fail[node]
+                while fallback and char not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                self.fail[child] = self.goto[fallback].get(char, 0)
+                inherited = self.best[self.fail[child]]
+                if inherited is not None and (self.best[child] is None or inherited[:2] > self.best[child][:2]):
+                    self.best[child] = inherited
+
+    def match(self, name: str) -> Tuple[str, str] | None:
+        """Returns (category name, keyword) of the winning keyword in ``name``, or None."""
+        goto, fail, best = self.goto, self.fail, self.best
+        node = 0
+        found = None
+        for char in name:
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            candidate = best[node]
+            if candidate is not None and (found is None or candidate[:2] > found[:2]):
+                found = candidate
+        return None if found is None else (found[2], found[3])
+
+    def match_batch(self, names: list[str]) -> list[Tuple[str, str] | None]:
+        """Matches a whole list of names against the compiled automaton."""
+        match = self.match
+        return [match(name) for name in names]
+
+
 class BudgetEntry:
     def __init__(self, data, year=2025):
         self.name = str(data["name"]).lower()
@@ -344,30 +415,37 @@ class BudgetEntry:
 
 class Categories:
     categories: dict[str, Category] = {}
+    matcher: KeywordMatcher | None = None
 
     def __init__(self):
         for name in categories:
             self.categories[name] = Category(
                 name, category_map_name[name], category_map_statement[name], float(0)
             )
+        # Compiled once and shared, every statement reuses the same automaton.
+        if Categories.matcher is None:
+            Categories.matcher = KeywordMatcher(category_map_statement)
 
     def __str__(self):
         return f"Categories(categories={self.categories})"
 
     def search(self, name) -> Category:
-        for category in self.categories.values():
-            if category.searching(name):
-                return category
-
-        return self.categories["other"]
+        return self.search_test(name)[0]
 
     def search_test(self, name) -> Tuple[Category, str]:
-        for category in self.categories.values():
-            outbool, outstring = category.searching_test(name)
-            if outbool:
-                return category, outstring
-
-        return self.categories["other"], None
+        match = self.matcher.match(name)
+        if match is None:
+            return self.categories["other"], None
+        category_name, keyword = match
+        return self.categories[category_name], keyword
+
+    def search_batch(self, names: list[str]) -> list[Category]:
+        """Categorizes a list of transaction names in one call."""
+        other = self.categories["other"]
+        return [
+            other if match is None else self.categories[match[0]]
+            for match in self.matcher.match_batch(names)
+        ]
 
     def addToTotal(self, budgetEntry: BudgetEntry):
         if budgetEntry.category:
@@ -439,6 +517,63 @@ class Categories:
 
 
 
+def keyword_table_hash(keyword_map: dict[str, list[str]]) -> str:
+    # Order matters too, it decides ties between equally long keywords.
+    return hashlib.sha256(json.dumps(list(keyword_map.items())).encode()).hexdigest()
+
+
+class CategoryCache:
+    """Merchant name -> category name cache saved to disk between runs.
+
+    Names are keyed exactly as BudgetEntry normalizes them (lowercased), so a
+    cached answer is always the one Categories.search would give. The file
+    stores the hash of category_map_statement it was built with and is
+    discarded on load when the keyword table has changed since.
+    """
+
+    def __init__(self, filename: str = "category_cache.json"):
+        self.filename = filename
+        self.keyword_hash = keyword_table_hash(category_map_statement)
+        self.entries: dict[str, str] = {}
+        self.hits = 0
+        self.misses = 0
+        self.load()
+
+    def load(self):
+        try:
+            with open(self.filename) as f:
+                stored = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return
+        if stored.get("keyword_hash") == self.keyword_hash:
+            self.entries = stored["entries"]
+        else:
+            print(f"category_map_statement changed, discarding {self.filename}")
+
+    def save(self):
+        with open(self.filename, "w") as f:
+            json.dump({"keyword_hash": self.keyword_hash, "entries": self.entries}, f)
+
+    def search_batch(self, categories: Categories, names: list[str]) -> list[Category]:
+        """Looks names up in the cache and categorizes only the unseen ones."""
+        unseen = [name for name in dict.fromkeys(names) if name not in self.entries]
+        for name, category in zip(unseen, categories.search_batch(unseen)):
+            self.entries[name] = category.name
+        self.misses += len(unseen)
+        self.hits += len(names) - len(unseen)
+        return [categories.categories[self.entries[name]] for name in names]
+
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def report(self) -> str:
+        return (
+            f"category cache: {self.hits} hits, {self.misses} misses "
+            f"({self.hit_rate():.1%} hit rate), {len(self.entries)} merchants stored"
+        )
+
+
 teststring = "vueling airlufnl9s barcelona"
 
 categories_test = Categories()
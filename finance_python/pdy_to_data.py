@@ -1,66 +1,73 @@
-from typing import List, Dict, Tuple
+from itertools import chain
+from typing import List, Dict, Iterator, Tuple
 import pymupdf
 import pandas
 import xlsxwriter
 import re
 
 
-def read_pdf_into_dicts(name: str) -> Tuple[List[Dict], List[Dict]]:
-    """Read a pdf and return a list of transaction dictionaries"""
-    doc = pymupdf.open(name)
-    end_strings = ["Transactions continued on next page", "TOTAL FEES FOR THIS PERIOD", "TOTAL INTEREST FOR THIS PERIOD"]
-    keep_going = False
-    transactions = []
+END_STRINGS = ["Transactions continued on next page", "TOTAL FEES FOR THIS PERIOD", "TOTAL INTEREST FOR THIS PERIOD"]
+REFERENCE_RE = re.compile(r"\d\d\d\d\d\d\d\S{10}")
+AMOUNT_RE = re.compile(r"\.\d\d$")
 
-    # combine all text from all pages
-    text = ""
+
+def iter_transaction_lines(doc) -> Iterator[str]:
+    """Yield the lines of the transaction tables, reading one page at a time"""
+    keep_going = False
     for page in doc:
-        text += page.get_text()
-    lines = text.splitlines()
-    # filter out transaction data
-    for line in lines:
-        if keep_going:
-            if any(s in line for s in end_strings):
-                keep_going = False
-            else:
-                transactions.append(line)
+        for line in page.get_text().splitlines():
+            if keep_going:
+                if any(s in line for s in END_STRINGS):
+                    keep_going = False
+                else:
+                    yield line
+
+            if "Transaction Description" in line:
+                keep_going = True
+
 
-        if "Transaction Description" in line:
-            keep_going = True
+def iter_pdf_transactions(name: str) -> Iterator[Tuple[bool, Dict]]:
+    """Yield (is_credit, transaction dict) for each transaction in a pdf, in statement order.
 
-    print(f"transactions: {transactions}") # useful for debugging
+    A reference number line sets the name (the line after it) and the date
+    (two lines before it) for the amount lines that follow. Only a four line
+    window is kept, so memory stays flat however long the statement is.
+    """
+    doc = pymupdf.open(name)
+    name_to_add = None
+    date_to_add = None
+    seen_reference = False
+    # the window slides one line at a time: two_before, one_before, current, next_line
+    two_before = one_before = current = None
+
+    for next_line in chain(iter_transaction_lines(doc), [None]):
+        if current is not None:
+            if REFERENCE_RE.search(current):
+                name_to_add = next_line
+                date_to_add = two_before
+                seen_reference = True
+
+            if AMOUNT_RE.search(current):
+                is_credit = "-" in current
+                # an "X" on a charge line ends the table, wherever it appears
+                if not is_credit and "X" in current:
+                    return
+                # amounts before the first reference number have no name to go with
+                if seen_reference:
+                    cents_to_add = round(
+                        float(current.replace("-", "").replace(",", "")) * 100
+                    )
+                    yield is_credit, {"name": name_to_add, "cents": cents_to_add, "date": date_to_add}
+
+        two_before, one_before, current = one_before, current, next_line
 
+
+def read_pdf_into_dicts(name: str) -> Tuple[List[Dict], List[Dict]]:
+    """Read a pdf and return a list of transaction dictionaries"""
     trans_obj_list = []
     inverse_trans_list = []
-    # filter transactions into list of dicts
-    for idx, trans in enumerate(transactions):
-        reference_match = re.search(r"\d\d\d\d\d\d\d\S{10}", trans)
-        amount_match = re.search(r"\.\d\d$", trans)
-        print(amount_match)
-
-        if reference_match:
-            name_to_add = transactions[idx + 1]
-            date_to_add = transactions[idx - 2]
-
-        if amount_match:
-            if "-" not in amount_match.string:
-                print(trans)
-                if "X" in trans:
-                    print("X found")
-                    print(trans)
-                    break
-                cents_to_add = round(float(trans.replace(",", "")) * 100)
-                trans_obj_list.append(
-                    {"name": name_to_add, "cents": cents_to_add, "date": date_to_add}
-                )
-            else:
-                cents_to_add = round(
-                    float(trans.replace("-", "").replace(",", "")) * 100
-                )
-                inverse_trans_list.append(
-                    {"name": name_to_add, "cents": cents_to_add, "date": date_to_add}
-                )
-    # print(trans_obj_list)
+    for is_credit, transaction in iter_pdf_transactions(name):
+        (inverse_trans_list if is_credit else trans_obj_list).append(transaction)
     return trans_obj_list, inverse_trans_list
 
 def read_csv_into_dicts(name: str) -> Tuple[List[Dict], List[Dict]]:
@@ -0,0 +1,88 @@
+import hashlib
+import sqlite3
+from typing import Dict, List, Tuple
+
+# Bump when read_pdf_into_dicts changes what it extracts, so old results are re-read.
+PARSER_VERSION = 2
+
+
+def file_hash(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class StatementCache:
+    """SQLite store of the transactions already extracted from each statement pdf.
+
+    The statements table is the manifest: one row per file with the sha256
+    of its contents. A file whose hash still matches is loaded from the
+    transactions table instead of going through read_pdf_into_dicts again.
+    """
+
+    def __init__(self, filename: str = "statements.sqlite"):
+        self.connection = sqlite3.connect(filename)
+        self.connection.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+            CREATE TABLE IF NOT EXISTS statements (filename TEXT PRIMARY KEY, sha256 TEXT);
+            CREATE TABLE IF NOT EXISTS transactions (
+                filename TEXT, position INTEGER, credit INTEGER,
+                name TEXT, cents INTEGER, date TEXT
+            );
+            CREATE INDEX IF NOT EXISTS transactions_filename ON transactions (filename);
+            """
+        )
+        row = self.connection.execute(
+            "SELECT value FROM meta WHERE key = 'parser_version'"
+        ).fetchone()
+        if row is None or int(row[0]) != PARSER_VERSION:
+            with self.connection:
+                self.connection.execute("DELETE FROM statements")
+                self.connection.execute("DELETE FROM transactions")
+                self.connection.execute(
+                    "INSERT OR REPLACE INTO meta VALUES ('parser_version', ?)",
+                    (str(PARSER_VERSION),),
+                )
+
+    def load(self, filename: str, sha256: str) -> Tuple[List[Dict], List[Dict]] | None:
+        """Returns the cached (charges, credits) for the file, or None if it is new or changed."""
+        row = self.connection.execute(
+            "SELECT sha256 FROM statements WHERE filename = ?", (filename,)
+        ).fetchone()
+        if row is None or row[0] != sha256:
+            return None
+        charges, credits = [], []
+        for credit, name, cents, date in self.connection.execute(
+            "SELECT credit, name, cents, date FROM transactions WHERE filename = ? ORDER BY position",
+            (filename,),
+        ):
+            (credits if credit else charges).append({"name": name, "cents": cents, "date": date})
+        return charges, credits
+
+    def store(self, filename: str, sha256: str, charges: List[Dict], credits: List[Dict]):
+        rows = [
+            (filename, position, credit, t["name"], t["cents"], t["date"])
+            for credit, transactions in ((0, charges), (1, credits))
+            for position, t in enumerate(transactions)
+        ]
+        with self.connection:
+            self.connection.execute("DELETE FROM transactions WHERE filename = ?", (filename,))
+            self.connection.executemany("INSERT INTO transactions VALUES (?, ?, ?, ?, ?, ?)", rows)
+            self.connection.execute(
+                "INSERT OR REPLACE INTO statements VALUES (?, ?)", (filename, sha256)
+            )
+
+    def prune(self, filenames: List[str]):
+        """Forgets statements that are no longer in the statements folder."""
+        keep = set(filenames)
+        known = [row[0] for row in self.connection.execute("SELECT filename FROM statements")]
+        removed = [(name,) for name in known if name not in keep]
+        with self.connection:
+            self.connection.executemany("DELETE FROM statements WHERE filename = ?", removed)
+            self.connection.executemany("DELETE FROM transactions WHERE filename = ?", removed)
+
+    def close(self):
+        self.connection.close()
@@ -0,0 +1,131 @@
+# benchmarks/bench_pipeline.py
+"""Times each stage of the sat_propagation pipeline on synthetic catalogs.
+
+Runs offline (no Space-Track credentials) from the sat_propagation folder:
+
+    python -m benchmarks.bench_pipeline --sizes 100,1000,10000 --steps 1,5
+
+Each (catalog size, time step, stage) measurement is appended as one JSON
+line to ``--output`` so runs from different commits can be compared.
+"""
+
+import argparse
+import json
+import platform
+import subprocess
+import time
+import tracemalloc
+from datetime import datetime, timezone
+import numpy as np
+import sgp4
+from benchmarks.synthetic_catalog import synthetic_tle
+from src.collision_analysis import (
+    parse_3le,
+    propagate_satellites,
+    propagate_satellites_batch,
+    positions_to_lists,
+    check_collisions,
+)
+from src.refinement import find_conjunctions
+from src.screening import conjunction_arrays
+
+def _git_revision():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def _measure(function, memory):
+    """Runs ``function`` once for wall time and, if ``memory``, once more under tracemalloc."""
+    start = time.perf_counter()
+    result = function()
+    seconds = time.perf_counter() - start
+
+    peak_mb = None
+    if memory:
+        del result
+        tracemalloc.start()
+        result = function()
+        peak_mb = tracemalloc.get_traced_memory()[1] / 2**20
+        tracemalloc.stop()
+    return result, seconds, peak_mb
+
+def _count(result):
+    """Returns a size figure for a stage result (objects, samples or events)."""
+    if isinstance(result, tuple):
+        return int(np.asarray(result[0]).size)
+    return len(result)
+
+def bench_catalog(size, step_minutes, hours, threshold, mix, seed, brute_max, memory):
+    """Benchmarks every stage on one synthetic catalog; returns a list of result dicts."""
+    text = synthetic_tle(size, mix=mix, seed=seed)
+    results = []
+
+    def record(stage, function):
+        result, seconds, peak_mb = _measure(function, memory)
+        results.append({"stage": stage, "seconds": seconds, "peak_mb": peak_mb, "count": _count(result)})
+        print(f"  {stage:<20} {seconds:10.3f} s" + (f" {peak_mb:10.1f} MB" if peak_mb is not None else ""))
+        return result
+
+    satellites = record("parse_3le", lambda: parse_3le(text))
+    start_time = satellites[0].jdsatepoch + satellites[0].jdsatepochF
+    end_time = start_time + hours / 24.0
+    time_step = step_minutes / (24.0 * 60.0)
+
+    if size <= brute_max:
+        record("propagate_loop", lambda: propagate_satellites(satellites, start_time, end_time, time_step))
+    errors, positions, _ = record(
+        "propagate_batch", lambda: propagate_satellites_batch(satellites, start_time, end_time, time_step)
+    )
+    record("screen_grid", lambda: conjunction_arrays(positions, errors, threshold))
+    if size <= brute_max:
+        propagated_positions = positions_to_lists(errors, positions)
+        record("check_collisions", lambda: check_collisions(propagated_positions, threshold))
+    record("find_conjunctions", lambda: find_conjunctions(
+        satellites, start_time, end_time, threshold, coarse_step=step_minutes, workers=1
+    ))
+    return results
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="100,1000,5000", help="comma-separated catalog sizes")
+    parser.add_argument("--steps", default="1,5", help="comma-separated time steps in minutes")
+    parser.add_argument("--hours", type=float, default=6.0, help="propagation window in hours")
+    parser.add_argument("--threshold", type=float, default=1.0, help="screening threshold in km")
+    parser.add_argument("--mix", default="0.8,0.15,0.05", help="LEO,MEO,GEO proportions")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--brute-max", type=int, default=300,
+                        help="largest catalog to run the per-sample Python loops on")
+    parser.add_argument("--no-memory", action="store_true", help="skip the tracemalloc pass")
+    parser.add_argument("--output", default="bench_results.jsonl")
+    args = parser.parse_args(argv)
+
+    mix = tuple(float(x) for x in args.mix.split(","))
+    run = {
+        "run_id": datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ"),
+        "git": _git_revision(),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "sgp4": sgp4.__version__,
+        "machine": platform.machine(),
+        "hours": args.hours,
+        "threshold": args.threshold,
+        "mix": mix,
+    }
+
+    with open(args.output, "a") as out:
+        for size in (int(x) for x in args.sizes.split(",")):
+            for step in (float(x) for x in args.steps.split(",")):
+                print(f"{size} objects, {step:g} min step, {args.hours:g} h:")
+                results = bench_catalog(
+                    size, step, args.hours, args.threshold, mix, args.seed,
+                    args.brute_max, not args.no_memory,
+                )
+                for result in results:
+                    out.write(json.dumps({**run, "size": size, "time_step_min": step, **result}) + "\n")
+    print(f"Results appended to {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+# benchmarks/synthetic_catalog.py
+
+import numpy as np
+from sgp4.api import Satrec, WGS72
+from sgp4.exporter import export_tle
+
+EARTH_RADIUS = 6378.135  # km, WGS72 as used by SGP4
+MU = 398600.8  # km^3/s^2, WGS72
+
+# (perigee altitude range km, eccentricity range, inclination range deg)
+REGIMES = {
+    "leo": ((300.0, 2000.0), (0.0, 0.02), (0.0, 100.0)),
+    "meo": ((19000.0, 24000.0), (0.0, 0.01), (50.0, 65.0)),
+    "geo": ((35770.0, 35800.0), (0.0, 0.001), (0.0, 1.0)),
+}
+
+# Share of LEO objects placed in dense constellation-like shells
+# (altitude km, inclination deg), which is what makes screening expensive.
+SHELLS = [(550.0, 53.0), (540.0, 53.2), (570.0, 70.0), (560.0, 97.6)]
+SHELL_FRACTION = 0.5
+
+def _mean_motion(perigee_alt, eccentricity):
+    """Returns the mean motion in rad/min for a perigee altitude and eccentricity."""
+    semi_major = (EARTH_RADIUS + perigee_alt) / (1.0 - eccentricity)
+    return np.sqrt(MU / semi_major**3) * 60.0
+
+def synthetic_tle(n_objects, mix=(0.8, 0.15, 0.05), epoch=25000.0, seed=0):
+    """Generates ``n_objects`` realistic element sets as 3LE text.
+
+    ``mix`` gives the LEO/MEO/GEO proportions. Half of the LEO objects sit in
+    constellation-like shells. ``epoch`` is in days since 1949 December 31
+    00:00 UT, as ``sgp4init`` expects.
+    """
+    rng = np.random.default_rng(seed)
+    weights = np.asarray(mix, dtype=np.float64)
+    regimes = rng.choice(list(REGIMES), size=n_objects, p=weights / weights.sum())
+
+    lines = []
+    for index, regime in enumerate(regimes):
+        (alt_lo, alt_hi), (ecc_lo, ecc_hi), (inc_lo, inc_hi) = REGIMES[regime]
+        perigee = rng.uniform(alt_lo, alt_hi)
+        eccentricity = rng.uniform(ecc_lo, ecc_hi)
+        inclination = rng.uniform(inc_lo, inc_hi)
+        if regime == "leo" and rng.random() < SHELL_FRACTION:
+            perigee, inclination = SHELLS[rng.integers(len(SHELLS))]
+            perigee += rng.normal(0.0, 1.0)
+            inclination += rng.normal(0.0, 0.01)
+            eccentricity = rng.uniform(0.0, 0.0005)
+
+        satellite = Satrec()
+        satellite.sgp4init(
+            WGS72, "i", 10000 + index, epoch,
+            rng.uniform(0.0, 1e-4),  # bstar
+            0.0, 0.0,  # ndot, nddot
+            eccentricity,
+            rng.uniform(0.0, 2.0 * np.pi),  # argument of perigee
+            np.radians(inclination),
+            rng.uniform(0.0, 2.0 * np.pi),  # mean anomaly
+            _mean_motion(perigee, eccentricity),
+            rng.uniform(0.0, 2.0 * np.pi),  # right ascension of ascending node
+        )
+        line1, line2 = export_tle(satellite)
+        lines.extend((f"0 SYNTH-{regime.upper()} {index}", line1, line2))
+    return "\r\n".join(lines)
@@ -0,0 +1,116 @@
+# src/catalog_stats.py
+
+import numpy as np
+from src.collision_probability import states_at
+from src.config import COARSE_TIME_STEP, WINDOW_LENGTH, STATS_BAND_WIDTH, WORKERS
+from src.refinement import iter_conjunctions
+
+EARTH_RADIUS = 6378.137  # km
+
+class CatalogStatistics:
+    """Close-approach statistics accumulated from refined conjunctions.
+
+    For each threshold in ``thresholds`` (km) it keeps:
+
+    - ``approaches``: (n_sats, n_thresholds) encounters per object under each threshold
+    - ``min_distance``: (n_sats,) smallest miss distance per object (inf if none)
+    - ``band_encounters``: (n_bands, n_thresholds) encounters by altitude band
+    - ``days``: total span the encounters were searched over
+
+    Encounters come from ``add_conjunctions``, fed ``find_conjunctions``
+    output at the largest threshold, so counts and distances use the miss
+    distance at the time of closest approach. Coarse samples would miss
+    most close approaches: two objects pass in seconds. Bands are
+    ``band_width`` km wide starting at the surface.
+    """
+
+    def __init__(self, n_sats, thresholds, band_width=STATS_BAND_WIDTH, max_altitude=40000.0):
+        self.thresholds = np.sort(np.asarray(thresholds, dtype=np.float64))
+        self.band_width = band_width
+        self.band_edges = np.arange(0.0, max_altitude + band_width, band_width)
+        n_bands = len(self.band_edges) - 1
+        self.approaches = np.zeros((n_sats, len(self.thresholds)), dtype=np.int64)
+        self.min_distance = np.full(n_sats, np.inf)
+        self.band_encounters = np.zeros((n_bands, len(self.thresholds)), dtype=np.int64)
+        self.days = 0.0
+
+    def _band(self, altitude):
+        return np.clip((altitude // self.band_width).astype(np.int64), 0, len(self.band_encounters) - 1)
+
+    def add_conjunctions(self, satellites, conjunctions, days):
+        """Adds conjunction records (``find_conjunctions`` output) found over ``days`` days.
+
+        Each record is one encounter, placed in the altitude band of the
+        pair's midpoint at TCA.
+        """
+        self.days += days
+        conjunctions = list(conjunctions)
+        if not conjunctions:
+            return
+        n_sats, k = self.approaches.shape
+        sat1 = np.array([c["sat1"] for c in conjunctions], dtype=np.int64)
+        sat2 = np.array([c["sat2"] for c in conjunctions], dtype=np.int64)
+        tca = np.array([c["tca"] for c in conjunctions])
+        distances = np.array([c["distance"] for c in conjunctions])
+
+        # Index of the smallest threshold each encounter is under; counts
+        # per bin are then accumulated across the (sorted) thresholds.
+        level = np.searchsorted(self.thresholds, distances, side="right")
+        inside = level < k
+        sat1, sat2, tca, distances, level = (a[inside] for a in (sat1, sat2, tca, distances, level))
+
+        for sat in (sat1, sat2):
+            counts = np.bincount(sat * k + level, minlength=n_sats * k).reshape(n_sats, k)
+            self.approaches += np.cumsum(counts, axis=1)
+            np.minimum.at(self.min_distance, sat, distances)
+
+        r, _ = states_at(satellites, np.concatenate([sat1, sat2]), np.concatenate([tca, tca]))
+        altitude = np.linalg.norm(0.5 * (r[:len(sat1)] + r[len(sat1):]), axis=1) - EARTH_RADIUS
+        found = np.isfinite(altitude)
+        band = self._band(altitude[found])
+        counts = np.bincount(band * k + level[found], minlength=self.band_encounters.size)
+        self.band_encounters += np.cumsum(counts.reshape(self.band_encounters.shape), axis=1)
+
+    def band_rate(self):
+        """Encounters per day in each altitude band and threshold."""
+        return self.band_encounters / self.days if self.days > 0 else np.zeros(self.band_encounters.shape)
+
+    def summary(self, satellites, top=10):
+        """Returns plain-data highlights: the busiest objects and the non-empty bands."""
+        busiest = np.lexsort((self.min_distance, -self.approaches[:, -1]))[:top]
+        bands = np.flatnonzero(self.band_encounters[:, -1])
+        rate = self.band_rate()
+        return {
+            "thresholds": self.thresholds.tolist(),
+            "days": self.days,
+            "objects": [
+                {
+                    "norad_id": satellites[i].satnum,
+                    "name": satellites[i].name,
+                    "approaches": self.approaches[i].tolist(),
+                    "min_distance": float(self.min_distance[i]),
+                }
+                for i in busiest.tolist() if self.approaches[i, -1] > 0
+            ],
+            "bands": [
+                {
+                    "altitude": [float(self.band_edges[b]), float(self.band_edges[b + 1])],
+                    "encounters": self.band_encounters[b].tolist(),
+                    "rate_per_day": rate[b].tolist(),
+                }
+                for b in bands.tolist()
+            ],
+        }
+
+def catalog_statistics(satellites, start_time, end_time, thresholds, coarse_step=COARSE_TIME_STEP,
+                       window=WINDOW_LENGTH, band_width=STATS_BAND_WIDTH, workers=WORKERS):
+    """Runs the conjunction search at the largest threshold and returns a filled ``CatalogStatistics``.
+
+    Encounters come from ``iter_conjunctions``, so memory use depends on
+    ``window`` rather than on the span.
+    """
+    stats = CatalogStatistics(len(satellites), thresholds, band_width)
+    stats.add_conjunctions(satellites, iter_conjunctions(
+        satellites, start_time, end_time, stats.thresholds[-1], window, coarse_step, workers=workers,
+    ), end_time - start_time)
+    return stats
@@ -1,20 +1,17 @@
 # src/collision_analysis.py
 
 import numpy as np
-from sgp4.api import Satrec
+from sgp4.api import SatrecArray, SGP4_ERRORS
 from sgp4.api import jday
+from src.tle_parser import parse_tle_text
+
+# SGP4 error codes after which an object never propagates again (orbit decayed
+# or elements degenerate); from there on the object is dropped, not re-tried.
+TERMINAL_ERRORS = (1, 2, 3, 4, 6)
 
 def parse_3le(tle_data):
-    """Parses 3LE data into a list of Satrec objects."""
-    lines = tle_data.strip().split('\r\n')
-    satellites = []
-    for i in range(0, len(lines), 3):
-        line0 = lines[i].strip()
-        line1 = lines[i+1].strip()
-        line2 = lines[i+2].strip()
-        satellite = Satrec.twoline2rv(line1, line2)
-        satellite.name = line0
-        satellites.append(satellite)
+    """Parses 2LE/3LE data into a list of Satrec objects, skipping malformed records."""
+    satellites, _, _ = parse_tle_text(tle_data)
     return satellites
 
 def propagate_satellites(satellites, start_time, end_time, time_step):
@@ -23,16 +20,110 @@ def propagate_satellites(satellites, start_time, end_time, time_step):
     for satellite in satellites:
         positions = []
         jd = start_time
+        failed = False
         while jd <= end_time:
-            error, r, v = satellite.sgp4(jd, 0)
-            if error == 0:
-                positions.append(r)
+            if failed:
+                positions.append(None) # Decayed; no need to call sgp4 again
             else:
-                positions.append(None) # Error in propagation
+                error, r, v = satellite.sgp4(jd, 0)
+                if error == 0:
+                    positions.append(r)
+                else:
+                    positions.append(None) # Error in propagation
+                    failed = error in TERMINAL_ERRORS
             jd += time_step
         propagated_positions.append(positions)
     return propagated_positions
 
+def time_grid(start_time, end_time, time_step):
+    """Builds the (jd, fr) epoch arrays used by the batch propagator.
+
+    The grid matches the epochs visited by ``propagate_satellites``: it starts
+    at ``start_time`` and advances by ``time_step`` days while the epoch is
+    still <= ``end_time``. The whole-day part is held constant in ``jd`` and
+    the offsets accumulate in ``fr`` to keep full precision in the sum.
+    """
+    n_steps = int(np.floor((end_time - start_time) / time_step + 1e-6)) + 1
+    jd = np.full(n_steps, start_time, dtype=np.float64)
+    fr = np.arange(n_steps, dtype=np.float64) * time_step
+    return jd, fr
+
+def covering_grid(start_time, end_time, time_step):
+    """Returns ``(n_steps, grid_end)`` for a grid whose last sample is at or past ``end_time``."""
+    n_steps = int(np.ceil((end_time - start_time) / time_step - 1e-6)) + 1
+    return n_steps, start_time + (n_steps - 1) * time_step
+
+def propagate_satellites_batch(satellites, start_time, end_time, time_step):
+    """Propagates all satellites against all epochs in one vectorized call.
+
+    Returns ``(errors, positions, velocities)`` where ``errors`` is a
+    ``(n_sats, n_steps)`` uint8 array of SGP4 error codes (0 means the sample
+    is valid) and ``positions``/``velocities`` are dense
+    ``(n_sats, n_steps, 3)`` float64 arrays in TEME km and km/s. Samples with
+    a non-zero error code hold NaN instead of leaving a ``None`` hole.
+    """
+    jd, fr = time_grid(start_time, end_time, time_step)
+    if not satellites:
+        empty = np.empty((0, len(jd), 3))
+        return np.empty((0, len(jd)), dtype=np.uint8), empty, empty.copy()
+
+    errors, positions, velocities = SatrecArray(satellites).sgp4(jd, fr)
+    failed = errors != 0
+    if failed.any():
+        positions[failed] = np.nan
+        velocities[failed] = np.nan
+    return errors, positions, velocities
+
+def first_failures(errors):
+    """Returns ``(step, code)`` of each object's first terminal error.
+
+    ``errors`` is the ``(n_sats, n_steps)`` array from
+    ``propagate_satellites_batch``; objects that never fail get
+    ``step == n_steps`` and ``code == 0``.
+    """
+    terminal = np.isin(errors, TERMINAL_ERRORS)
+    failed = terminal.any(axis=1)
+    step = np.where(failed, terminal.argmax(axis=1), errors.shape[1])
+    code = np.zeros(len(errors), dtype=np.uint8)
+    code[failed] = errors[failed, step[failed]]
+    return step, code
+
+def live_objects(satellites, index, epoch):
+    """Splits ``satellites[index]`` by whether they still propagate at ``epoch`` (Julian date).
+
+    Returns ``(alive, failed, codes)``: the indices without a terminal error,
+    the indices with one and their SGP4 error codes. Each object is
+    evaluated at a single epoch, so this costs one vectorized call.
+    """
+    index = np.asarray(index, dtype=np.int64)
+    if len(index) == 0:
+        return index, index.copy(), np.empty(0, dtype=np.uint8)
+    jd = np.floor(epoch)
+    errors, _, _ = SatrecArray([satellites[k] for k in index.tolist()]).sgp4(
+        np.array([jd]), np.array([epoch - jd])
+    )
+    terminal = np.isin(errors[:, 0], TERMINAL_ERRORS)
+    return index[~terminal], index[terminal], errors[terminal, 0]
+
+def failure_summary(codes):
+    """Returns ``[(code, count, message)]`` for a list of SGP4 error codes, most common first."""
+    values, counts = np.unique(np.asarray(codes, dtype=np.uint8), return_counts=True)
+    order = np.argsort(-counts, kind="stable")
+    return [
+        (int(values[k]), int(counts[k]), SGP4_ERRORS.get(int(values[k]), "unknown error"))
+        for k in order.tolist()
+    ]
+
+def positions_to_lists(errors, positions):
+    """Converts batch output into the nested lists ``check_collisions`` expects."""
+    propagated_positions = []
+    for sat_errors, sat_positions in zip(errors, positions):
+        propagated_positions.append([
+            tuple(r) if error == 0 else None
+            for error, r in zip(sat_errors, sat_positions.tolist())
+        ])
+    return propagated_positions
+
 def check_collisions(propagated_positions, threshold):
     """Checks for collisions between propagated satellite positions."""
     num_satellites = len(propagated_positions)
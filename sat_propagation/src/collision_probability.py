@@ -0,0 +1,137 @@
+# src/collision_probability.py
+
+import numpy as np
+from src.config import HARD_BODY_RADIUS, POSITION_SIGMA, OBJECT_RADII, OBJECT_SIGMAS
+
+# Quadrature nodes over the hard-body disc: Gauss-Legendre in radius and
+# evenly spaced in angle (exact for the periodic angular integrand).
+PC_RADIAL_NODES = 8
+PC_ANGULAR_NODES = 16
+
+def states_at(satellites, index, tca):
+    """Propagates ``satellites[index[k]]`` to ``tca[k]`` (Julian dates).
+
+    Each distinct satellite is propagated once over all of its epochs with
+    ``sgp4_array``. Returns ``(r, v)`` arrays of shape (n, 3) in TEME km and
+    km/s, NaN where SGP4 reports an error.
+    """
+    index = np.asarray(index, dtype=np.int64)
+    tca = np.asarray(tca, dtype=np.float64)
+    jd = np.floor(tca)
+    fr = tca - jd
+    r = np.full((len(index), 3), np.nan)
+    v = np.full((len(index), 3), np.nan)
+    for k in np.unique(index).tolist():
+        rows = np.flatnonzero(index == k)
+        errors, r_k, v_k = satellites[k].sgp4_array(jd[rows], fr[rows])
+        ok = errors == 0
+        r[rows[ok]] = r_k[ok]
+        v[rows[ok]] = v_k[ok]
+    return r, v
+
+def rtn_covariance(r, v, sigmas):
+    """Rotates diagonal radial/in-track/cross-track sigmas into TEME covariances.
+
+    ``r``, ``v`` and ``sigmas`` are (n, 3) arrays; returns (n, 3, 3).
+    """
+    radial = r / np.linalg.norm(r, axis=1, keepdims=True)
+    normal = np.cross(r, v)
+    normal /= np.linalg.norm(normal, axis=1, keepdims=True)
+    in_track = np.cross(normal, radial)
+    frame = np.stack([radial, in_track, normal], axis=1)  # rows are the RTN axes
+    return np.einsum("nki,nk,nkj->nij", frame, np.square(sigmas), frame)
+
+def encounter_plane(r1, v1, r2, v2, covariance):
+    """Projects a pair's relative geometry onto the plane normal to the relative velocity.
+
+    Returns ``(miss, plane_covariance)``: the miss distance at TCA (n,) and
+    the combined covariance in the encounter plane (n, 2, 2), with the first
+    plane axis along the miss vector.
+    """
+    dr = r2 - r1
+    along = v2 - v1
+    along /= np.linalg.norm(along, axis=1, keepdims=True)
+    miss_vector = dr - np.sum(dr * along, axis=1, keepdims=True) * along
+    miss = np.linalg.norm(miss_vector, axis=1)
+
+    # A zero miss leaves the in-plane orientation free; any perpendicular will do.
+    fallback = np.cross(along, np.where(np.abs(along[:, :1]) < 0.9, [[1.0, 0.0, 0.0]], [[0.0, 1.0, 0.0]]))
+    x_axis = np.where((miss > 0.0)[:, None], miss_vector, fallback)
+    x_axis /= np.linalg.norm(x_axis, axis=1, keepdims=True)
+    z_axis = np.cross(along, x_axis)
+
+    plane = np.stack([x_axis, z_axis], axis=1)
+    return miss, np.einsum("nai,nij,nbj->nab", plane, covariance, plane)
+
+def pc_circle(miss, plane_covariance, radius, radial_nodes=PC_RADIAL_NODES,
+              angular_nodes=PC_ANGULAR_NODES):
+    """Integrates the 2D Gaussian over a disc of ``radius`` centred ``miss`` along the x axis.
+
+    All arguments broadcast over events; every event is evaluated on the same
+    quadrature grid, so the cost is one array pass of n x nodes.
+    """
+    t, w = np.polynomial.legendre.leggauss(radial_nodes)
+    radius = np.broadcast_to(np.asarray(radius, dtype=np.float64), miss.shape)
+    rho = 0.5 * (t + 1.0)[None, :] * radius[:, None]  # (n, r)
+    weights = 0.5 * w[None, :] * radius[:, None] * rho * (2.0 * np.pi / angular_nodes)
+    theta = np.arange(angular_nodes) * (2.0 * np.pi / angular_nodes)
+
+    x = miss[:, None, None] + rho[:, :, None] * np.cos(theta)  # (n, r, a)
+    y = rho[:, :, None] * np.sin(theta)
+
+    a = plane_covariance[:, 0, 0, None, None]
+    b = plane_covariance[:, 0, 1, None, None]
+    c = plane_covariance[:, 1, 1, None, None]
+    det = a * c - b * b
+    with np.errstate(divide="ignore", invalid="ignore"):
+        exponent = -0.5 * (c * x * x - 2.0 * b * x * y + a * y * y) / det
+        density = np.exp(exponent) / (2.0 * np.pi * np.sqrt(det))
+        pc = np.sum(density * weights[:, :, None], axis=(1, 2))
+    # A degenerate covariance means the miss distance is exact.
+    exact = (miss < radius).astype(np.float64)
+    return np.clip(np.where(det[:, 0, 0] > 0.0, pc, exact), 0.0, 1.0)
+
+def _per_object(satellites, index, default, overrides):
+    """Looks up a per-NORAD-ID setting for each entry of ``index``."""
+    return np.array([overrides.get(satellites[k].satnum, default) for k in index.tolist()],
+                    dtype=np.float64)
+
+def collision_probabilities(satellites, sat1, sat2, tca, radii=None, sigmas=None):
+    """Computes the probability of collision of each conjunction, vectorized over events.
+
+    ``sat1``, ``sat2`` and ``tca`` are parallel arrays (Julian date TCAs).
+    States are re-propagated to TCA, each object's position covariance is
+    built from its radial/in-track/cross-track sigmas (km), and the combined
+    covariance is integrated over the combined hard-body disc in the
+    encounter plane. ``sigmas`` optionally gives a ``(sigmas1, sigmas2)``
+    pair of (n, 3) arrays; by default each object uses its ``OBJECT_SIGMAS``
+    entry or ``POSITION_SIGMA``. ``radii`` optionally gives the
+    combined hard-body radius (km) per event; by default it is the sum of the
+    two objects' ``OBJECT_RADII`` or ``HARD_BODY_RADIUS``. Events whose
+    states cannot be propagated get NaN.
+    """
+    sat1 = np.asarray(sat1, dtype=np.int64)
+    sat2 = np.asarray(sat2, dtype=np.int64)
+    if len(sat1) == 0:
+        return np.empty(0)
+
+    tca = np.asarray(tca, dtype=np.float64)
+    both = np.concatenate([sat1, sat2])
+    r, v = states_at(satellites, both, np.concatenate([tca, tca]))
+    if sigmas is None:
+        sigmas = _per_object(satellites, both, POSITION_SIGMA, OBJECT_SIGMAS)
+    else:
+        sigmas = np.concatenate(sigmas)
+    if radii is None:
+        radius = _per_object(satellites, both, HARD_BODY_RADIUS, OBJECT_RADII)
+        radii = radius[:len(sat1)] + radius[len(sat1):]
+
+    n = len(sat1)
+    ok = ~np.isnan(r).any(axis=1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        covariance = rtn_covariance(r, v, sigmas)
+        miss, plane_covariance = encounter_plane(
+            r[:n], v[:n], r[n:], v[n:], covariance[:n] + covariance[n:]
+        )
+        pc = pc_circle(miss, plane_covariance, radii)
+    return np.where(ok[:n] & ok[n:], pc, np.nan)
@@ -18,3 +18,73 @@ PROPAGATION_TIME = 1  # Propagate for 1 day
 
 # Collision threshold (in km)
 COLLISION_THRESHOLD = 1.0
+
+# Worker processes for propagation and screening (1 runs everything in-process)
+WORKERS = 1
+
+# Coarse-to-fine conjunction search
+COARSE_TIME_STEP = 5.0  # Longest coarse screening step (in minutes)
+COARSE_MAX_DISTANCE = 500.0  # Shorten the coarse step so the widened screening distance stays under this (in km)
+FINE_TIME_STEP = 10.0  # Re-propagation step inside candidate windows (in seconds)
+TCA_TOLERANCE = 0.01  # Time-of-closest-approach convergence tolerance (in seconds)
+MAX_RELATIVE_SPEED = 16.0  # Upper bound on relative speed between two objects (in km/s)
+
+# Element-based prefilter applied before any propagated positions are compared
+PREFILTER_MARGIN = 10.0  # Extra altitude/path separation allowed for drag and J2 drift (in km)
+PREFILTER_ORBIT_GEOMETRY = False  # Also drop pairs whose orbital paths never come close
+
+# Optional on-disk ephemeris of the coarse propagation grid. When set, the first
+# run writes it and later runs with unchanged elements re-screen from it
+# without propagating again, whatever their threshold.
+EPHEMERIS_FILE = None  # e.g. "ephemeris.bin"
+EPHEMERIS_DTYPE = "float32"  # float32 or float64 state storage
+EPHEMERIS_SLACK = 0.25  # Extra span stored on either side of the window, so later runs still fit in it (in days)
+
+# Local TLE cache
+TLE_CACHE_FILE = "tle_cache.sqlite"
+TLE_MAX_AGE = 8.0  # Re-check cached element sets older than this (in hours)
+TLE_MISS_TTL = 24.0  # Wait this long before asking again for IDs Space-Track returned nothing for (in hours)
+OFFLINE = False  # Serve runs entirely from the cache without contacting space-track.org
+
+# Space-Track query client
+QUERY_CHUNK_SIZE = 500  # NORAD IDs per request, keeps query URLs well under length limits
+QUERY_CONCURRENCY = 4  # Requests in flight at once over the shared session
+QUERY_RATE_LIMITS = [(30, 60.0), (300, 3600.0)]  # Space-Track quotas as (requests, per seconds)
+QUERY_MAX_RETRIES = 5  # Attempts per chunk on throttling or server errors
+QUERY_BACKOFF = 2.0  # Base delay for exponential backoff between retries (in seconds)
+
+# Continuous screening service (python -m src.daemon)
+DAEMON_INTERVAL = 60.0  # Minutes between element-set refreshes
+DAEMON_REBUILD_AFTER = 6.0  # Hours before the screening window is rolled forward and rebuilt
+DAEMON_PORT = 8080  # Local port serving the current conjunction list as JSON
+
+# Sliding-window screening for long horizons
+WINDOW_LENGTH = 6.0  # Length of each propagate-and-screen chunk (in hours)
+
+# Probability of collision
+HARD_BODY_RADIUS = 0.005  # Default object radius; a pair's hard-body radius is the sum (in km)
+POSITION_SIGMA = (0.1, 0.5, 0.1)  # Default 1-sigma position error, radial/in-track/cross-track (in km)
+OBJECT_RADII = {}  # Per NORAD ID overrides of HARD_BODY_RADIUS
+OBJECT_SIGMAS = {}  # Per NORAD ID overrides of POSITION_SIGMA
+
+# Results output
+RESULTS_FILE = "conjunctions.csv"  # .csv, .parquet (needs pyarrow) or .cdm; None to only print
+PRINT_TOP = 10  # Highest-risk conjunctions echoed to the console
+
+# Stage profiling
+METRICS_ENABLED = False  # Record per-stage wall/CPU time, memory and counts
+METRICS_TRACE_MEMORY = False  # Per-stage peak allocations via tracemalloc (slower) instead of process RSS
+METRICS_FILE = None  # e.g. "metrics.json", or "metrics.prom" for Prometheus text format
+
+# Ground-station pass prediction
+GROUND_STATIONS = []  # (name, latitude deg, longitude deg, altitude km), e.g. ("Svalbard", 78.23, 15.39, 0.5)
+MIN_ELEVATION = 10.0  # Elevation above which an object counts as visible (in degrees)
+PASS_TIME_STEP = 0.5  # Propagation step for pass prediction (in minutes)
+
+# Overlapped fetch/parse/propagate pipeline for full-catalog runs
+PIPELINE_ASYNC = False  # Download, parse and propagate chunks concurrently instead of in sequence
+PIPELINE_QUEUE_SIZE = 4  # Chunks buffered between pipeline stages before upstream stages wait
+
+# Catalog-wide close-approach statistics
+STATS_THRESHOLDS = []  # Distances to count approaches under, e.g. [1.0, 5.0, 10.0] (in km); empty to skip
+STATS_BAND_WIDTH = 50.0  # Altitude band width for encounter rates (in km)
@@ -0,0 +1,242 @@
+# src/daemon.py
+
+import json
+import threading
+import time
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import numpy as np
+from sgp4.api import jday
+from src.collision_analysis import covering_grid, propagate_satellites_batch
+from src.config import (
+    SATELLITES_OF_INTEREST,
+    PROPAGATION_TIME,
+    COLLISION_THRESHOLD,
+    COARSE_TIME_STEP,
+    FINE_TIME_STEP,
+    TCA_TOLERANCE,
+    MAX_RELATIVE_SPEED,
+    DAEMON_INTERVAL,
+    DAEMON_REBUILD_AFTER,
+    DAEMON_PORT,
+)
+from src.main import jd_to_datetime
+from src.refinement import coarse_distance, coarse_candidates, pair_filter, refine_candidates, screening_step
+from src.screening import conjunction_arrays, conjunction_arrays_for
+from src.tle_cache import get_tle_data
+from src.tle_parser import SatelliteCache, parse_tle_stream, tle_lines
+
+def _now_jd():
+    now = datetime.utcnow()
+    jd, fr = jday(now.year, now.month, now.day, now.hour, now.minute, now.second)
+    return jd + fr
+
+def _sort_key(conjunction):
+    return conjunction["sat1"], conjunction["sat2"], conjunction["tca"]
+
+class ScreeningService:
+    """Long-running conjunction screening state that is updated incrementally.
+
+    The coarse ephemeris of the whole catalog and the current conjunction
+    list are kept in memory. ``update`` re-propagates only the objects whose
+    element sets changed and re-screens only the pairs that involve them;
+    every other conjunction is kept as is. ``snapshot`` returns the current
+    conjunction list and the timings of the last rebuild and update.
+    """
+
+    def __init__(self, satellites, start_time, end_time, threshold=COLLISION_THRESHOLD,
+                 coarse_step=COARSE_TIME_STEP, fine_step=FINE_TIME_STEP,
+                 tolerance=TCA_TOLERANCE, max_relative_speed=MAX_RELATIVE_SPEED):
+        self.threshold = threshold
+        self.coarse_step = screening_step(threshold, coarse_step, max_relative_speed)
+        self.coarse_days = self.coarse_step / (24.0 * 60.0)
+        self.fine_step = fine_step
+        self.tolerance = tolerance
+        self.max_relative_speed = max_relative_speed
+        self.lock = threading.Lock()
+        self.timings = {}
+        self.rebuild(satellites, start_time, end_time)
+
+    @property
+    def _step_seconds(self):
+        return self.coarse_step * 60.0
+
+    def _refine(self, satellites, start_time, end_time, n_steps, arrays, screened):
+        errors, positions, velocities = arrays
+        sat1, sat2, steps = coarse_candidates(
+            satellites, errors, positions, velocities, self.threshold,
+            self._step_seconds, self.max_relative_speed, None, screened,
+        )
+        return refine_candidates(
+            satellites, start_time, end_time - start_time, self.coarse_days,
+            n_steps, sat1, sat2, steps, self.threshold, self.fine_step, self.tolerance,
+        )
+
+    def rebuild(self, satellites, start_time, end_time):
+        """Propagates and screens the whole catalog over a new window.
+
+        The new state is built aside and swapped in under the lock in one
+        step, so ``snapshot`` never pairs old conjunctions with the new catalog.
+        """
+        started = time.perf_counter()
+        satellites = list(satellites)
+        n_steps, grid_end = covering_grid(start_time, end_time, self.coarse_days)
+        arrays = propagate_satellites_batch(satellites, start_time, grid_end, self.coarse_days)
+        distance = coarse_distance(self.threshold, self._step_seconds, self.max_relative_speed)
+        keep = pair_filter(satellites, self.threshold)
+        screened = conjunction_arrays(arrays[1], arrays[0], distance, keep)
+        conjunctions = self._refine(satellites, start_time, end_time, n_steps, arrays, screened)
+
+        with self.lock:
+            self.satellites = satellites
+            self.index = {satellite.satnum: k for k, satellite in enumerate(satellites)}
+            self.start_time, self.end_time = start_time, end_time
+            self.n_steps, self.grid_end = n_steps, grid_end
+            self.errors, self.positions, self.velocities = arrays
+            self.conjunctions = conjunctions
+            self.timings["rebuild"] = {
+                "seconds": time.perf_counter() - started,
+                "objects": len(satellites),
+                "at": time.time(),
+            }
+
+    def update(self, satellites):
+        """Applies new element sets and returns how many objects were re-processed.
+
+        Objects whose TLE lines are unchanged are ignored; unknown NORAD IDs
+        are appended to the catalog. As in ``rebuild``, the catalog and the
+        conjunctions are swapped in together.
+        """
+        started = time.perf_counter()
+        catalog = list(self.satellites)
+        index = dict(self.index)
+        changed = []
+        for satellite in satellites:
+            k = index.get(satellite.satnum)
+            if k is None:
+                index[satellite.satnum] = len(catalog)
+                changed.append(len(catalog))
+                catalog.append(satellite)
+            elif catalog[k] is not satellite and tle_lines(catalog[k]) != tle_lines(satellite):
+                catalog[k] = satellite
+                changed.append(k)
+        if not changed:
+            return 0
+
+        # snapshot never reads the arrays, so rows are replaced in place
+        # unless the catalog grew.
+        errors, positions, velocities = self.errors, self.positions, self.velocities
+        added = len(catalog) - len(errors)
+        if added:
+            errors = np.concatenate([errors, np.zeros((added, self.n_steps), np.uint8)])
+            positions = np.concatenate([positions, np.zeros((added, self.n_steps, 3))])
+            velocities = np.concatenate([velocities, np.zeros((added, self.n_steps, 3))])
+
+        changed = np.array(sorted(changed), dtype=np.int64)
+        errors[changed], positions[changed], velocities[changed] = propagate_satellites_batch(
+            [catalog[k] for k in changed], self.start_time, self.grid_end, self.coarse_days
+        )
+
+        distance = coarse_distance(self.threshold, self._step_seconds, self.max_relative_speed)
+        keep = pair_filter(catalog, self.threshold)
+        screened = conjunction_arrays_for(positions, errors, distance, changed, keep)
+        fresh = self._refine(
+            catalog, self.start_time, self.end_time, self.n_steps, (errors, positions, velocities), screened
+        )
+        changed_set = set(changed.tolist())
+        kept = [
+            c for c in self.conjunctions
+            if c["sat1"] not in changed_set and c["sat2"] not in changed_set
+        ]
+
+        with self.lock:
+            self.satellites, self.index = catalog, index
+            self.errors, self.positions, self.velocities = errors, positions, velocities
+            self.conjunctions = sorted(kept + fresh, key=_sort_key)
+            self.timings["update"] = {
+                "seconds": time.perf_counter() - started,
+                "objects": len(changed),
+                "at": time.time(),
+            }
+        return len(changed)
+
+    def snapshot(self):
+        """Returns the current window, conjunction list and timings as plain data."""
+        with self.lock:
+            satellites = self.satellites
+            window = [self.start_time, self.end_time]
+            conjunctions = list(self.conjunctions)
+            timings = dict(self.timings)
+        return {
+            "window": window,
+            "objects": len(satellites),
+            "timings": timings,
+            "conjunctions": [
+                {
+                    **c,
+                    "norad1": satellites[c["sat1"]].satnum,
+                    "norad2": satellites[c["sat2"]].satnum,
+                    "name1": satellites[c["sat1"]].name,
+                    "name2": satellites[c["sat2"]].name,
+                    "tca_utc": jd_to_datetime(c["tca"]).isoformat(),
+                }
+                for c in conjunctions
+            ],
+        }
+
+def serve_status(service, port=DAEMON_PORT):
+    """Serves ``service.snapshot()`` as JSON on GET / from a background thread."""
+
+    class StatusHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            body = json.dumps(service.snapshot()).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", port), StatusHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def main():
+    """Runs the screening service, refreshing element sets every DAEMON_INTERVAL minutes."""
+    if not SATELLITES_OF_INTEREST:
+        print("No satellites of interest defined in src/config.py")
+        return
+
+    # Unchanged element sets keep their initialized satellites between refreshes,
+    # and the TLE cache is re-checked every cycle rather than every TLE_MAX_AGE.
+    cache = SatelliteCache()
+    max_age = DAEMON_INTERVAL / 60.0
+    satellites, _, _ = parse_tle_stream(get_tle_data(SATELLITES_OF_INTEREST, max_age=max_age), cache)
+    start_time = _now_jd()
+    service = ScreeningService(satellites, start_time, start_time + PROPAGATION_TIME)
+    serve_status(service)
+    print(
+        f"Screening {len(satellites)} objects, {len(service.conjunctions)} conjunctions, "
+        f"status on http://127.0.0.1:{DAEMON_PORT}/"
+    )
+
+    while True:
+        time.sleep(DAEMON_INTERVAL * 60.0)
+        try:
+            # Refresh first so a rebuild always propagates the newest elements.
+            satellites, _, _ = parse_tle_stream(get_tle_data(SATELLITES_OF_INTEREST, max_age=max_age), cache)
+            now = _now_jd()
+            if now - service.start_time > DAEMON_REBUILD_AFTER / 24.0:
+                service.rebuild(satellites, now, now + PROPAGATION_TIME)
+                print(f"Rebuilt window in {service.timings['rebuild']['seconds']:.1f} s")
+                continue
+            updated = service.update(satellites)
+            if updated:
+                print(f"Re-screened {updated} updated objects in {service.timings['update']['seconds']:.1f} s")
+        except Exception as e:
+            print(f"Error refreshing screening: {e}")
+
+if __name__ == "__main__":
+    main()
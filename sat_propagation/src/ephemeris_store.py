@@ -0,0 +1,174 @@
+# src/ephemeris_store.py
+
+import hashlib
+import json
+import struct
+import numpy as np
+from src.collision_analysis import covering_grid, propagate_satellites_batch, time_grid
+from src.screening import conjunction_arrays, merge_hits
+from src.tle_parser import tle_lines
+
+MAGIC = b"EPHSTOR1"
+# Columns start on this boundary so memory-mapped views are aligned.
+_ALIGNMENT = 64
+
+def catalog_hash(satellites):
+    """Fingerprints the element sets so a store can tell if it is stale."""
+    digest = hashlib.sha1()
+    for satellite in satellites:
+        line1, line2 = tle_lines(satellite)
+        digest.update(f"{line1}\n{line2}\n".encode())
+    return digest.hexdigest()
+
+def _aligned(offset):
+    return (offset + _ALIGNMENT - 1) // _ALIGNMENT * _ALIGNMENT
+
+def _layout(header, data_offset):
+    """Returns the (offset, shape, dtype) of each column described by ``header``."""
+    n_sats, n_steps = header["n_sats"], header["n_steps"]
+    dtype = np.dtype(header["dtype"])
+    columns = {
+        "errors": ((n_sats, n_steps), np.dtype(np.uint8)),
+        "positions": ((n_sats, n_steps, 3), dtype),
+        "velocities": ((n_sats, n_steps, 3), dtype),
+    }
+    offset = data_offset
+    layout = {}
+    for name, (shape, column_dtype) in columns.items():
+        layout[name] = (offset, shape, column_dtype)
+        offset = _aligned(offset + int(np.prod(shape)) * column_dtype.itemsize)
+    return layout, offset
+
+class EphemerisWriter:
+    """Writes propagated states into a columnar, memory-mappable ephemeris file.
+
+    The file starts with a magic tag, a length-prefixed JSON header describing
+    the epoch grid, dtype and NORAD IDs, and then one aligned column each for
+    error codes, positions and velocities laid out ``(n_sats, n_steps[, 3])``.
+    Rows are written a block of satellites at a time, so nothing larger than
+    one block ever has to be held in memory.
+    """
+
+    def __init__(self, path, norad_ids, start_time, end_time, time_step, n_steps,
+                 dtype=np.float32, catalog=None):
+        header = {
+            "n_sats": len(norad_ids),
+            "n_steps": n_steps,
+            "start_time": start_time,
+            "end_time": end_time,
+            "time_step": time_step,
+            "dtype": np.dtype(dtype).str,
+            "norad_ids": [int(norad_id) for norad_id in norad_ids],
+            "catalog": catalog,
+        }
+        encoded = json.dumps(header).encode()
+        layout, size = _layout(header, _aligned(len(MAGIC) + 4 + len(encoded)))
+        with open(path, "wb") as f:
+            f.write(MAGIC)
+            f.write(struct.pack("<I", len(encoded)))
+            f.write(encoded)
+            f.truncate(size)
+
+        self._columns = {
+            name: np.memmap(path, dtype=dtype, mode="r+", offset=offset, shape=shape)
+            for name, (offset, shape, dtype) in layout.items()
+        }
+
+    def write(self, lo, errors, positions, velocities):
+        """Stores the rows for satellites ``lo`` onward."""
+        hi = lo + len(errors)
+        self._columns["errors"][lo:hi] = errors
+        self._columns["positions"][lo:hi] = positions
+        self._columns["velocities"][lo:hi] = velocities
+
+    def close(self):
+        for column in self._columns.values():
+            column.flush()
+        self._columns = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def write_ephemeris(path, satellites, start_time, end_time, time_step, dtype=np.float32,
+                    block_size=1000):
+    """Propagates ``satellites`` block by block straight into an ephemeris file.
+
+    The grid runs from ``start_time`` to the first sample at or past
+    ``end_time`` so the whole screening span is bracketed by samples.
+    """
+    n_steps, grid_end = covering_grid(start_time, end_time, time_step)
+    norad_ids = [satellite.satnum for satellite in satellites]
+    with EphemerisWriter(path, norad_ids, start_time, end_time, time_step, n_steps, dtype,
+                         catalog_hash(satellites)) as writer:
+        for lo in range(0, len(satellites), block_size):
+            block = satellites[lo:lo + block_size]
+            writer.write(lo, *propagate_satellites_batch(block, start_time, grid_end, time_step))
+
+class EphemerisStore:
+    """Read-only, memory-mapped view of an ephemeris file.
+
+    ``errors``, ``positions`` and ``velocities`` are ``np.memmap`` arrays, so
+    slicing them only pages in the rows and steps that are actually read.
+    """
+
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"{path} is not an ephemeris store")
+            (length,) = struct.unpack("<I", f.read(4))
+            header = json.loads(f.read(length))
+
+        self.path = path
+        self.n_sats = header["n_sats"]
+        self.n_steps = header["n_steps"]
+        self.start_time = header["start_time"]
+        self.end_time = header["end_time"]
+        self.time_step = header["time_step"]
+        self.norad_ids = np.array(header["norad_ids"], dtype=np.int64)
+        self.catalog = header["catalog"]
+
+        layout, _ = _layout(header, _aligned(len(MAGIC) + 4 + length))
+        for name, (offset, shape, dtype) in layout.items():
+            column = np.memmap(path, dtype=dtype, mode="r", offset=offset, shape=shape)
+            setattr(self, name, column)
+
+    def covers(self, start_time, end_time):
+        """Returns True if the stored window spans [start_time, end_time]."""
+        return self.start_time <= start_time + 1e-9 and end_time <= self.end_time + 1e-9
+
+    @property
+    def grid_end(self):
+        """Julian date of the last sample, at or just past ``end_time``."""
+        return self.start_time + (self.n_steps - 1) * self.time_step
+
+    def epochs(self):
+        """Returns the (jd, fr) epoch grid the states were propagated on."""
+        return time_grid(self.start_time, self.grid_end, self.time_step)
+
+    def time_slice(self, lo, hi):
+        """Returns ``(errors, positions, velocities)`` for time steps [lo, hi) as float64 arrays."""
+        return (
+            np.asarray(self.errors[:, lo:hi]),
+            np.asarray(self.positions[:, lo:hi], dtype=np.float64),
+            np.asarray(self.velocities[:, lo:hi], dtype=np.float64),
+        )
+
+def conjunction_arrays_from_store(store, threshold, chunk_steps=60, first=0, stop=None, keep=None):
+    """Runs ``conjunction_arrays`` over a store a chunk of time steps at a time.
+
+    Only ``chunk_steps`` columns of the file are resident at once, so the
+    threshold can be changed and the catalog re-screened without
+    re-propagating or loading the whole ephemeris. ``first``/``stop`` limit
+    the screening to time steps [first, stop); returned steps index the
+    whole store. ``keep`` filters pairs as in ``conjunction_arrays``.
+    """
+    stop = store.n_steps if stop is None else stop
+    results = []
+    for lo in range(first, stop, chunk_steps):
+        errors, positions, _ = store.time_slice(lo, min(lo + chunk_steps, stop))
+        sat1, sat2, steps, distances = conjunction_arrays(positions, errors, threshold, keep)
+        results.append((sat1, sat2, steps + lo, distances))
+    return merge_hits(results)
@@ -0,0 +1,191 @@
+# src/frames.py
+
+import numpy as np
+from src.collision_analysis import propagate_satellites_batch, time_grid
+from src.config import MIN_ELEVATION
+
+# WGS-84 ellipsoid and Earth rotation rate
+WGS84_A = 6378.137  # km
+WGS84_F = 1.0 / 298.257223563
+WGS84_E2 = WGS84_F * (2.0 - WGS84_F)
+EARTH_ROTATION = 7.292115146706979e-5  # rad/s
+
+def gmst(jd, fr):
+    """Greenwich mean sidereal time (IAU 1982, as used by SGP4) in radians.
+
+    ``jd`` and ``fr`` are the epoch arrays of ``time_grid``; each epoch is
+    evaluated once and the result is shared by every object on that grid.
+    UT1 is taken as UTC.
+    """
+    t = ((np.asarray(jd) - 2451545.0) + np.asarray(fr)) / 36525.0
+    seconds = ((-6.2e-6 * t + 0.093104) * t + 876600.0 * 3600.0 + 8640184.812866) * t + 67310.54841
+    return np.mod(np.radians(seconds / 240.0), 2.0 * np.pi)
+
+def teme_to_ecef(positions, velocities, jd, fr):
+    """Rotates TEME states into the Earth-fixed frame (polar motion neglected).
+
+    ``positions``/``velocities`` are ``(..., n_steps, 3)`` arrays such as the
+    batch propagation output; ``velocities`` may be None. Returns
+    ``(r_ecef, v_ecef)`` with the same shapes.
+    """
+    theta = gmst(jd, fr)
+    c, s = np.cos(theta), np.sin(theta)
+    x, y, z = positions[..., 0], positions[..., 1], positions[..., 2]
+    r_ecef = np.stack([c * x + s * y, c * y - s * x, z], axis=-1)
+    if velocities is None:
+        return r_ecef, None
+    vx, vy, vz = velocities[..., 0], velocities[..., 1], velocities[..., 2]
+    v_ecef = np.stack([
+        c * vx + s * vy + EARTH_ROTATION * r_ecef[..., 1],
+        c * vy - s * vx - EARTH_ROTATION * r_ecef[..., 0],
+        vz,
+    ], axis=-1)
+    return r_ecef, v_ecef
+
+def ecef_to_geodetic(r_ecef, iterations=3):
+    """Converts ECEF km to WGS-84 ``(latitude, longitude, altitude)`` in degrees and km.
+
+    Uses Bowring's initial guess refined by a few fixed-point iterations,
+    which is well under a millimetre for orbital altitudes.
+    """
+    x, y, z = r_ecef[..., 0], r_ecef[..., 1], r_ecef[..., 2]
+    p = np.hypot(x, y)
+    lon = np.arctan2(y, x)
+    lat = np.arctan2(z, p * (1.0 - WGS84_E2))
+    for _ in range(iterations):
+        sin_lat = np.sin(lat)
+        n = WGS84_A / np.sqrt(1.0 - WGS84_E2 * sin_lat**2)
+        lat = np.arctan2(z + WGS84_E2 * n * sin_lat, p)
+    sin_lat, cos_lat = np.sin(lat), np.cos(lat)
+    n = WGS84_A / np.sqrt(1.0 - WGS84_E2 * sin_lat**2)
+    # Use whichever form is well conditioned at the current latitude.
+    alt = np.where(
+        np.abs(cos_lat) > 1e-3,
+        p / np.where(np.abs(cos_lat) > 1e-3, cos_lat, 1.0) - n,
+        np.abs(z) - n * (1.0 - WGS84_E2),
+    )
+    return np.degrees(lat), np.degrees(lon), alt
+
+def ground_tracks(positions, jd, fr):
+    """Returns ``(latitude, longitude, altitude)`` arrays for batch TEME positions."""
+    r_ecef, _ = teme_to_ecef(positions, None, jd, fr)
+    return ecef_to_geodetic(r_ecef)
+
+def station_ecef(latitude, longitude, altitude):
+    """Returns the ECEF position (km) of a station at geodetic degrees and km."""
+    lat, lon = np.radians(latitude), np.radians(longitude)
+    n = WGS84_A / np.sqrt(1.0 - WGS84_E2 * np.sin(lat)**2)
+    return np.array([
+        (n + altitude) * np.cos(lat) * np.cos(lon),
+        (n + altitude) * np.cos(lat) * np.sin(lon),
+        (n * (1.0 - WGS84_E2) + altitude) * np.sin(lat),
+    ])
+
+def look_angles(r_ecef, latitude, longitude, altitude):
+    """Returns ``(azimuth, elevation, range)`` (degrees, degrees, km) from a station.
+
+    ``r_ecef`` has any leading shape with a final axis of 3.
+    """
+    lat, lon = np.radians(latitude), np.radians(longitude)
+    d = r_ecef - station_ecef(latitude, longitude, altitude)
+    east = -np.sin(lon) * d[..., 0] + np.cos(lon) * d[..., 1]
+    north = (-np.sin(lat) * np.cos(lon) * d[..., 0] - np.sin(lat) * np.sin(lon) * d[..., 1]
+             + np.cos(lat) * d[..., 2])
+    up = (np.cos(lat) * np.cos(lon) * d[..., 0] + np.cos(lat) * np.sin(lon) * d[..., 1]
+          + np.sin(lat) * d[..., 2])
+    distance = np.sqrt(east**2 + north**2 + up**2)
+    azimuth = np.mod(np.degrees(np.arctan2(east, north)), 360.0)
+    elevation = np.degrees(np.arcsin(up / distance))
+    return azimuth, elevation, distance
+
+def _crossing(jd, fr, k, elevation_before, elevation_after, min_elevation, visible_side):
+    """Interpolates the Julian date where elevation crosses ``min_elevation`` between steps k and k+1.
+
+    Where the invisible sample failed to propagate, the visible sample
+    (``visible_side`` 0 for step k, 1 for step k+1) is used as is.
+    """
+    with np.errstate(divide="ignore", invalid="ignore"):
+        w = np.clip((min_elevation - elevation_before) / (elevation_after - elevation_before), 0.0, 1.0)
+    w = np.nan_to_num(w, nan=float(visible_side))
+    return jd[k] + fr[k] + w * (fr[k + 1] - fr[k])
+
+def predict_passes(errors, positions, jd, fr, stations, min_elevation=MIN_ELEVATION):
+    """Finds station passes on a batch propagation grid.
+
+    ``errors``/``positions`` come from ``propagate_satellites_batch`` on the
+    ``(jd, fr)`` grid of ``time_grid``, and ``stations`` is a list of
+    ``(name, latitude, longitude, altitude)`` in degrees and km. The TEME to
+    ECEF rotation is done once for the whole catalog and each station then
+    takes one vectorized elevation pass. Rise and set times are interpolated
+    between samples; passes already in progress at either end of the grid
+    start or end there.
+
+    Returns ``(station, sat, rise, set, max_elevation)`` arrays, with rise
+    and set as Julian dates, sorted by station, then satellite, then rise.
+    """
+    r_ecef, _ = teme_to_ecef(positions, None, jd, fr)
+    valid = errors == 0
+    n_steps = positions.shape[1]
+    columns = ([], [], [], [], [])
+
+    for index, (_, latitude, longitude, altitude) in enumerate(stations):
+        _, elevation, _ = look_angles(r_ecef, latitude, longitude, altitude)
+        visible = valid & (elevation >= min_elevation)
+        padded = np.zeros((len(visible), n_steps + 2), dtype=np.int8)
+        padded[:, 1:-1] = visible
+        edges = np.diff(padded, axis=1)
+        sat, first = np.nonzero(edges == 1)  # first visible step
+        _, last = np.nonzero(edges == -1)  # one past the last visible step
+        last = last - 1
+        if not len(sat):
+            continue
+
+        rise = jd[first] + fr[first]
+        inside = first > 0
+        k = first[inside] - 1
+        rise[inside] = _crossing(jd, fr, k, elevation[sat[inside], k], elevation[sat[inside], k + 1],
+                                 min_elevation, 1)
+        set_ = jd[last] + fr[last]
+        inside = last < n_steps - 1
+        k = last[inside]
+        set_[inside] = _crossing(jd, fr, k, elevation[sat[inside], k], elevation[sat[inside], k + 1],
+                                 min_elevation, 0)
+
+        # Maximum over each [first, last] run: reduce between interleaved run
+        # bounds of the flattened array and keep every other result.
+        flat = np.append(elevation.ravel(), -np.inf)
+        bounds = np.column_stack([sat * n_steps + first, sat * n_steps + last + 1]).ravel()
+        peak = np.maximum.reduceat(flat, bounds)[::2]
+
+        columns[0].append(np.full(len(sat), index))
+        columns[1].append(sat)
+        columns[2].append(rise)
+        columns[3].append(set_)
+        columns[4].append(peak)
+
+    if not columns[0]:
+        empty = np.empty(0, dtype=np.int64)
+        return empty, empty.copy(), np.empty(0), np.empty(0), np.empty(0)
+    return tuple(np.concatenate(column) for column in columns)
+
+def station_passes(satellites, start_time, end_time, time_step, stations,
+                   min_elevation=MIN_ELEVATION, block_size=1000):
+    """Propagates ``satellites`` on a ``time_step``-day grid and returns ``predict_passes`` output.
+
+    The catalog is processed ``block_size`` objects at a time so memory stays
+    bounded on fine grids; satellite indices refer to the full list.
+    """
+    jd, fr = time_grid(start_time, end_time, time_step)
+    blocks = []
+    for lo in range(0, len(satellites), block_size):
+        errors, positions, _ = propagate_satellites_batch(
+            satellites[lo:lo + block_size], start_time, end_time, time_step
+        )
+        station, sat, rise, set_, peak = predict_passes(errors, positions, jd, fr, stations, min_elevation)
+        blocks.append((station, sat + lo, rise, set_, peak))
+    if not blocks:
+        return predict_passes(np.empty((0, len(jd)), np.uint8), np.empty((0, len(jd), 3)), jd, fr, stations)
+
+    station, sat, rise, set_, peak = (np.concatenate(column) for column in zip(*blocks))
+    order = np.lexsort((rise, sat, station))
+    return station[order], sat[order], rise[order], set_[order], peak[order]
@@ -1,10 +1,82 @@
 # src/main.py
 
+import asyncio
 from datetime import datetime, timedelta
+import os
+import numpy as np
 from sgp4.api import jday
-from src.config import SATELLITES_OF_INTEREST, PROPAGATION_TIME, COLLISION_THRESHOLD
-from src.spacetrack_fetcher import get_spacetrack_data
-from src.collision_analysis import parse_3le, propagate_satellites, check_collisions
+from src.config import (
+    SATELLITES_OF_INTEREST,
+    PROPAGATION_TIME,
+    COLLISION_THRESHOLD,
+    PREFILTER_MARGIN,
+    PREFILTER_ORBIT_GEOMETRY,
+    COARSE_TIME_STEP,
+    EPHEMERIS_FILE,
+    EPHEMERIS_DTYPE,
+    EPHEMERIS_SLACK,
+    RESULTS_FILE,
+    PRINT_TOP,
+    METRICS_FILE,
+    GROUND_STATIONS,
+    PASS_TIME_STEP,
+    PIPELINE_ASYNC,
+    STATS_THRESHOLDS,
+    OFFLINE,
+)
+from src.tle_cache import TLECache, get_tle_data
+from src.pipeline import fetch_and_propagate
+from src.tle_parser import parse_tle_stream
+from src.prefilter import prefilter_pairs
+from src.collision_probability import collision_probabilities
+from src.results import ConjunctionTable, write_results
+from src.metrics import metrics
+from src.frames import station_passes
+from src.catalog_stats import catalog_statistics
+from src.collision_analysis import failure_summary
+from src.refinement import (
+    iter_conjunctions,
+    find_conjunctions_in_store,
+    find_conjunctions_in_arrays,
+    screening_step,
+)
+from src.ephemeris_store import EphemerisStore, catalog_hash, write_ephemeris
+
+def jd_to_datetime(jd):
+    """Converts a Julian date to a naive UTC datetime."""
+    return datetime(2000, 1, 1, 12) + timedelta(days=jd - 2451545.0)
+
+def load_ephemeris(satellites, start_time, end_time, coarse_step, path=EPHEMERIS_FILE,
+                   slack=EPHEMERIS_SLACK):
+    """Opens the ephemeris at ``path``, (re)writing it first if it cannot be reused.
+
+    A store of the same element sets is reused, whatever its time step, as
+    long as it misses at most ``slack`` days of [start_time, end_time]. New
+    stores get ``slack`` days to spare on either side, so the next runs with
+    a later start still fit. Returns ``(store, start, end)``: the store and
+    the part of the window it covers.
+    """
+    if os.path.exists(path):
+        store = EphemerisStore(path)
+        start, end = max(start_time, store.start_time), min(end_time, store.end_time)
+        missing = (end_time - start_time) - (end - start)
+        if store.catalog == catalog_hash(satellites) and end > start and missing <= slack + 1e-9:
+            print(f"  Reusing ephemeris in {path}")
+            return store, start, end
+        del store
+
+    print(f"  Writing ephemeris to {path}")
+    write_ephemeris(path, satellites, start_time - slack, end_time + slack,
+                    coarse_step / (24.0 * 60.0), EPHEMERIS_DTYPE)
+    return EphemerisStore(path), start_time, end_time
+
+def print_metrics():
+    """Prints the per-stage timings and counters collected during the run."""
+    print("\nStage timings:")
+    for stage, values in metrics.stages.items():
+        print(f"  {stage:<12} {values['wall_seconds']:9.3f} s wall {values['cpu_seconds']:9.3f} s CPU")
+    for name, value in metrics.counters.items():
+        print(f"  {name:<20} {value}")
 
 def main():
     """Main function to run the collision analysis."""
@@ -12,43 +84,134 @@ def main():
         print("No satellites of interest defined in src/config.py")
         return
 
-    print("Fetching TLE data from space-track.org...")
-    try:
-        tle_data = get_spacetrack_data(SATELLITES_OF_INTEREST)
-    except Exception as e:
-        print(f"Error fetching TLE data: {e}")
-        return
-
-    print("Parsing TLE data...")
-    satellites = parse_3le(tle_data)
-
-    print("Propagating satellite orbits...")
     now = datetime.utcnow()
-    start_time = jday(now.year, now.month, now.day, now.hour, now.minute, now.second)
+    jd, fr = jday(now.year, now.month, now.day, now.hour, now.minute, now.second)
+    start_time = jd + fr
     end_time = start_time + PROPAGATION_TIME
-    time_step = 1.0 / (24.0 * 60.0)  # 1 minute time step
-
-    propagated_positions = propagate_satellites(satellites, start_time, end_time, time_step)
-
-    print("Checking for potential collisions...")
-    collisions = check_collisions(propagated_positions, COLLISION_THRESHOLD)
-
-    if collisions:
-        print("\nPotential collisions detected:")
-        for collision in collisions:
-            sat1_name = satellites[collision["sat1"]].name
-            sat2_name = satellites[collision["sat2"]].name
-            time_of_collision = now + timedelta(minutes=collision["time_step"])
-            distance = collision["distance"]
-            print(
-                f"  - Satellites: {sat1_name} and {sat2_name}\
-"  # Corrected newline escape
-                f"    Time: {time_of_collision.isoformat()}\
-"  # Corrected newline escape
-                f"    Distance: {distance:.2f} km"
+    coarse_step = screening_step(COLLISION_THRESHOLD, COARSE_TIME_STEP)
+
+    ephemeris = None
+    if PIPELINE_ASYNC and not OFFLINE:
+        print("Fetching, parsing and propagating TLE data concurrently...")
+        cache = TLECache()
+        try:
+            satellites, parse_report, *ephemeris = asyncio.run(
+                fetch_and_propagate(SATELLITES_OF_INTEREST, start_time, end_time, coarse_step, cache=cache)
             )
+        except Exception as e:
+            print(f"Error fetching TLE data: {e}")
+            return
+        finally:
+            cache.close()
     else:
+        print("Fetching TLE data (local cache, refreshed from space-track.org)...")
+        try:
+            with metrics.stage("fetch"):
+                tle_data = get_tle_data(SATELLITES_OF_INTEREST)
+        except Exception as e:
+            print(f"Error fetching TLE data: {e}")
+            return
+
+        print("Parsing TLE data...")
+        with metrics.stage("parse"):
+            satellites, _, parse_report = parse_tle_stream(tle_data)
+    metrics.count("objects_parsed", parse_report["records"])
+    metrics.count("records_skipped", len(parse_report["skipped"]))
+    print(f"  {parse_report['records']} objects parsed, {len(parse_report['skipped'])} malformed records skipped")
+
+    print("Prefiltering satellite pairs...")
+    with metrics.stage("prefilter"):
+        pair_i, pair_j, report = prefilter_pairs(
+            satellites, COLLISION_THRESHOLD, PREFILTER_MARGIN, PREFILTER_ORBIT_GEOMETRY
+        )
+    metrics.count("pairs_total", report["total_pairs"])
+    metrics.count("pairs_pruned", report["total_pairs"] - report["remaining_pairs"])
+    print(
+        f"  {report['total_pairs']} pairs, {report['altitude_eliminated']} eliminated by altitude band, "
+        f"{report['geometry_eliminated']} by orbit geometry, {report['remaining_pairs']} remaining"
+    )
+
+    print("Propagating and screening satellite orbits...")
+    with metrics.stage("search"):
+        if ephemeris is not None:
+            collisions = find_conjunctions_in_arrays(
+                satellites, start_time, end_time, *ephemeris, COLLISION_THRESHOLD, coarse_step,
+                pairs=(pair_i, pair_j),
+            )
+        elif EPHEMERIS_FILE:
+            store, screen_start, screen_end = load_ephemeris(satellites, start_time, end_time, coarse_step)
+            if (screen_start, screen_end) != (start_time, end_time):
+                print(f"  Screening the stored part of the window, {jd_to_datetime(screen_start)} "
+                      f"to {jd_to_datetime(screen_end)} UTC")
+            collisions = find_conjunctions_in_store(
+                satellites, store, COLLISION_THRESHOLD, pairs=(pair_i, pair_j),
+                start_time=screen_start, end_time=screen_end,
+            )
+        else:
+            # Propagation and screening run window by window, bounding memory on long horizons.
+            dropped = []
+            collisions = list(iter_conjunctions(
+                satellites, start_time, end_time, COLLISION_THRESHOLD, pairs=(pair_i, pair_j),
+                dropped=dropped,
+            ))
+            if dropped:
+                print(f"  {len(dropped)} objects dropped after terminal propagation errors:")
+                for code, count, message in failure_summary([code for _, code, _ in dropped]):
+                    print(f"    {count} x error {code}: {message}")
+
+    print("Computing collision probabilities...")
+    with metrics.stage("probability"):
+        table = ConjunctionTable.from_records(satellites, collisions)
+        table.pc = collision_probabilities(satellites, table.sat1, table.sat2, table.tca)
+        table = table.sorted_by_risk()
+
+    if not len(table):
         print("\nNo potential collisions detected.")
+    else:
+        if RESULTS_FILE:
+            with metrics.stage("write"):
+                write_results(table, RESULTS_FILE)
+            print(f"\n{len(table)} potential collisions written to {RESULTS_FILE}")
+
+        shown = table.take(slice(0, PRINT_TOP))
+        print(f"\nHighest-risk potential collisions ({len(shown)} of {len(table)}):")
+        for name1, name2, tca, distance, pc in zip(
+            shown.name1, shown.name2, np.datetime_as_string(shown.tca_utc(), unit="s"), shown.distance, shown.pc
+        ):
+            print(f"  - {name1} and {name2}  Time: {tca}  Distance: {distance:.2f} km  Pc: {pc:.2e}")
+
+    if STATS_THRESHOLDS:
+        print("\nComputing catalog close-approach statistics...")
+        # The statistics pass repeats the search; keep it out of the search counters.
+        with metrics.stage("statistics"), metrics.suspended():
+            summary = catalog_statistics(satellites, start_time, end_time, STATS_THRESHOLDS).summary(satellites)
+        labels = " / ".join(f"<{threshold:g} km" for threshold in summary["thresholds"])
+        print(f"  Encounters per day by altitude band ({labels}):")
+        for band in summary["bands"]:
+            low, high = band["altitude"]
+            rates = " / ".join(f"{rate:.1f}" for rate in band["rate_per_day"])
+            print(f"    {low:7.0f}-{high:<7.0f} km  {rates}")
+        print(f"  Objects with the most approaches ({labels}):")
+        for entry in summary["objects"]:
+            counts = " / ".join(str(count) for count in entry["approaches"])
+            print(f"    {entry['name']} ({entry['norad_id']}): {counts}, closest {entry['min_distance']:.2f} km")
+
+    if GROUND_STATIONS:
+        print("\nPredicting ground-station passes...")
+        with metrics.stage("passes"):
+            station, _, rise, _, _ = station_passes(
+                satellites, start_time, end_time, PASS_TIME_STEP / (24.0 * 60.0), GROUND_STATIONS
+            )
+        for index, (name, _, _, _) in enumerate(GROUND_STATIONS):
+            mine = rise[station == index]
+            first = f", first rise {jd_to_datetime(mine.min()).isoformat()}" if len(mine) else ""
+            print(f"  {name}: {len(mine)} passes{first}")
+
+    if metrics.enabled:
+        print_metrics()
+        if METRICS_FILE:
+            metrics.write(METRICS_FILE)
+            print(f"Metrics written to {METRICS_FILE}")
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,159 @@
+# src/metrics.py
+
+import contextlib
+import json
+import sys
+import time
+import tracemalloc
+from src.config import METRICS_ENABLED, METRICS_TRACE_MEMORY
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+_NULL_STAGE = contextlib.nullcontext()
+
+def _max_rss_bytes():
+    if resource is None:
+        return None
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS.
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss if sys.platform == "darwin" else rss * 1024
+
+class Metrics:
+    """Per-stage timings and pipeline counters.
+
+    ``stage(name)`` is a context manager recording wall time, CPU time and
+    memory for a block; repeated stages (e.g. one per screening window)
+    accumulate. ``count(name, value)`` adds to a counter. Hooks added with
+    ``add_hook`` are called as ``hook("stage", name, values)`` when a stage
+    ends and ``hook("count", name, value)`` on every count.
+
+    When disabled, ``stage`` returns a shared no-op context and ``count``
+    returns immediately, so the instrumentation can stay in hot code paths.
+    Memory is the process peak RSS at the end of each stage; with
+    ``trace_memory`` it is the peak Python/numpy allocation inside the stage
+    (via tracemalloc, which slows allocation-heavy code noticeably).
+    """
+
+    def __init__(self, enabled=METRICS_ENABLED, trace_memory=METRICS_TRACE_MEMORY):
+        self.enabled = enabled
+        self.trace_memory = trace_memory
+        self.stages = {}
+        self.counters = {}
+        self.hooks = []
+        self._stack = []
+
+    def enable(self, trace_memory=None):
+        self.enabled = True
+        if trace_memory is not None:
+            self.trace_memory = trace_memory
+
+    def add_hook(self, hook):
+        self.hooks.append(hook)
+
+    def reset(self):
+        self.stages = {}
+        self.counters = {}
+
+    @contextlib.contextmanager
+    def suspended(self):
+        """Records nothing inside the block, so a side computation does not add to the run's totals."""
+        enabled, self.enabled = self.enabled, False
+        try:
+            yield
+        finally:
+            self.enabled = enabled
+
+    def stage(self, name):
+        if not self.enabled:
+            return _NULL_STAGE
+        return self._timed(name)
+
+    @contextlib.contextmanager
+    def _timed(self, name):
+        tracing = self.trace_memory
+        if tracing:
+            started_tracing = not tracemalloc.is_tracing()
+            if started_tracing:
+                tracemalloc.start()
+            # Fold the parent's peak so far in before resetting it for this stage.
+            if self._stack:
+                self._stack[-1]["peak"] = max(self._stack[-1]["peak"], tracemalloc.get_traced_memory()[1])
+            tracemalloc.reset_peak()
+            frame = {"base": tracemalloc.get_traced_memory()[0], "peak": 0}
+        else:
+            frame = None
+        self._stack.append(frame)
+        wall, cpu = time.perf_counter(), time.process_time()
+        try:
+            yield
+        finally:
+            wall, cpu = time.perf_counter() - wall, time.process_time() - cpu
+            self._stack.pop()
+            if tracing:
+                peak = max(frame["peak"], tracemalloc.get_traced_memory()[1])
+                if self._stack and self._stack[-1] is not None:
+                    self._stack[-1]["peak"] = max(self._stack[-1]["peak"], peak)
+                memory = {"peak_bytes": peak - frame["base"]}
+                if started_tracing:
+                    tracemalloc.stop()
+            else:
+                memory = {"max_rss_bytes": _max_rss_bytes()}
+
+            values = self.stages.setdefault(
+                name, {"calls": 0, "wall_seconds": 0.0, "cpu_seconds": 0.0}
+            )
+            values["calls"] += 1
+            values["wall_seconds"] += wall
+            values["cpu_seconds"] += cpu
+            for key, value in memory.items():
+                if value is not None:
+                    values[key] = max(values.get(key, 0), value)
+            for hook in self.hooks:
+                hook("stage", name, dict(values))
+
+    def count(self, name, value=1):
+        if not self.enabled:
+            return
+        self.counters[name] = self.counters.get(name, 0) + int(value)
+        for hook in self.hooks:
+            hook("count", name, self.counters[name])
+
+    def snapshot(self):
+        """Returns the stages and counters as plain data."""
+        return {"stages": {k: dict(v) for k, v in self.stages.items()}, "counters": dict(self.counters)}
+
+    def to_json(self):
+        return json.dumps(self.snapshot(), indent=2)
+
+    def to_prometheus(self, prefix="sat_propagation"):
+        """Renders the metrics in the Prometheus text exposition format."""
+        lines = []
+        for key, help_text in (
+            ("calls", "Times the stage ran"),
+            ("wall_seconds", "Wall-clock time spent in the stage"),
+            ("cpu_seconds", "Process CPU time spent in the stage"),
+            ("peak_bytes", "Peak traced allocation inside the stage"),
+            ("max_rss_bytes", "Process peak resident set size at the end of the stage"),
+        ):
+            samples = [(stage, values[key]) for stage, values in self.stages.items() if key in values]
+            if not samples:
+                continue
+            lines.append(f"# HELP {prefix}_stage_{key} {help_text}")
+            lines.append(f"# TYPE {prefix}_stage_{key} gauge")
+            lines.extend(f'{prefix}_stage_{key}{{stage="{stage}"}} {value}' for stage, value in samples)
+        if self.counters:
+            lines.append(f"# HELP {prefix}_count Pipeline object and event counts")
+            lines.append(f"# TYPE {prefix}_count gauge")
+            lines.extend(f'{prefix}_count{{name="{name}"}} {value}' for name, value in self.counters.items())
+        return "\n".join(lines) + "\n"
+
+    def write(self, path):
+        """Writes Prometheus text if ``path`` ends in .prom, JSON otherwise."""
+        with open(path, "w") as f:
+            f.write(self.to_prometheus() if path.endswith(".prom") else self.to_json())
+
+# Process-wide instance used by the pipeline stages.
+metrics = Metrics()
@@ -0,0 +1,138 @@
+# src/parallel.py
+
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+import numpy as np
+from sgp4.api import Satrec
+from src.collision_analysis import propagate_satellites_batch, time_grid
+from src.screening import conjunction_arrays, merge_hits
+from src.tle_parser import tle_lines
+
+def _shard_bounds(n_items, n_shards):
+    """Splits range(n_items) into up to ``n_shards`` contiguous, ordered (lo, hi) bounds."""
+    edges = np.linspace(0, n_items, min(n_shards, max(n_items, 1)) + 1).astype(int)
+    return [(lo, hi) for lo, hi in zip(edges[:-1].tolist(), edges[1:].tolist()) if hi > lo]
+
+def _attach(name, shape, dtype):
+    """Attaches to an existing shared memory block and returns (block, array view)."""
+    block = shared_memory.SharedMemory(name=name)
+    return block, np.ndarray(shape, dtype=dtype, buffer=block.buf)
+
+class SharedEphemeris:
+    """Batch propagation arrays backed by shared memory so workers can read and write them in place.
+
+    Exposes ``errors``, ``positions`` and ``velocities`` with the same layout
+    as ``propagate_satellites_batch``. Use it as a context manager, or call
+    ``close()``, to release the shared blocks.
+    """
+
+    _LAYOUT = {
+        "errors": ((), np.uint8),
+        "positions": ((3,), np.float64),
+        "velocities": ((3,), np.float64),
+    }
+
+    def __init__(self, n_sats, n_steps):
+        self.shape = (n_sats, n_steps)
+        self._blocks = {}
+        for field, (tail, dtype) in self._LAYOUT.items():
+            shape = self.shape + tail
+            size = max(int(np.prod(shape)) * np.dtype(dtype).itemsize, 1)
+            block = shared_memory.SharedMemory(create=True, size=size)
+            self._blocks[field] = block
+            setattr(self, field, np.ndarray(shape, dtype=dtype, buffer=block.buf))
+
+    def handles(self):
+        """Returns the picklable (name, shape, dtype) description of each block."""
+        return {
+            field: (self._blocks[field].name, self.shape + tail, dtype)
+            for field, (tail, dtype) in self._LAYOUT.items()
+        }
+
+    def close(self):
+        """Drops the array views and frees the shared memory blocks."""
+        for field in self._LAYOUT:
+            setattr(self, field, None)
+        for block in self._blocks.values():
+            block.close()
+            block.unlink()
+        self._blocks = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def _propagate_shard(lines, lo, start_time, end_time, time_step, handles):
+    """Worker: propagates one contiguous shard of satellites into the shared arrays."""
+    satellites = [Satrec.twoline2rv(line1, line2) for line1, line2 in lines]
+    errors, positions, velocities = propagate_satellites_batch(
+        satellites, start_time, end_time, time_step
+    )
+    hi = lo + len(satellites)
+    for field, result in (("errors", errors), ("positions", positions), ("velocities", velocities)):
+        block, view = _attach(*handles[field])
+        try:
+            view[lo:hi] = result
+        finally:
+            # The view must be gone before close(), or it raises BufferError
+            # and hides whatever went wrong in the copy.
+            del view
+            block.close()
+
+def propagate_satellites_parallel(satellites, start_time, end_time, time_step, workers):
+    """Shards satellites across worker processes and propagates them in parallel.
+
+    Each worker rebuilds its satellites from their TLE lines, propagates them
+    with ``propagate_satellites_batch`` and writes its rows straight into a
+    ``SharedEphemeris``, so no arrays are pickled back to the parent. The
+    result is identical to the serial batch path.
+    """
+    jd, _ = time_grid(start_time, end_time, time_step)
+    ephemeris = SharedEphemeris(len(satellites), len(jd))
+    try:
+        handles = ephemeris.handles()
+        lines = [tle_lines(satellite) for satellite in satellites]
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [
+                pool.submit(_propagate_shard, lines[lo:hi], lo, start_time, end_time, time_step, handles)
+                for lo, hi in _shard_bounds(len(satellites), workers)
+            ]
+            for future in futures:
+                future.result()
+    except BaseException:
+        ephemeris.close()
+        raise
+    return ephemeris
+
+def _screen_shard(handles, lo, hi, threshold, keep):
+    """Worker: screens time steps [lo, hi) of the shared arrays."""
+    errors_block, errors = _attach(*handles["errors"])
+    positions_block, positions = _attach(*handles["positions"])
+    try:
+        sat1, sat2, steps, distances = conjunction_arrays(
+            positions[:, lo:hi], errors[:, lo:hi], threshold, keep
+        )
+        return sat1, sat2, steps + lo, distances
+    finally:
+        del errors, positions
+        errors_block.close()
+        positions_block.close()
+
+def conjunction_arrays_parallel(ephemeris, threshold, workers, keep=None):
+    """Parallel version of ``conjunction_arrays`` over a ``SharedEphemeris``.
+
+    The time axis is split into contiguous shards, each screened by a worker
+    reading the shared arrays in place; only the (small) hit lists come back.
+    Hits are merged and sorted exactly as the serial path orders them.
+    ``keep`` is sent to every worker, so it must be picklable.
+    """
+    handles = ephemeris.handles()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [
+            pool.submit(_screen_shard, handles, lo, hi, threshold, keep)
+            for lo, hi in _shard_bounds(ephemeris.shape[1], workers)
+        ]
+        results = [future.result() for future in futures]
+    return merge_hits(results)
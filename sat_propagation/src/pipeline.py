@@ -0,0 +1,140 @@
+# src/pipeline.py
+
+import asyncio
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from sgp4.api import Satrec
+from src.collision_analysis import covering_grid, propagate_satellites_batch
+from src.config import COARSE_TIME_STEP, WORKERS, PIPELINE_QUEUE_SIZE
+from src.metrics import metrics
+from src.spacetrack_fetcher import get_client
+from src.tle_parser import parse_tle_text, tle_lines
+
+def _propagate_lines(lines, start_time, end_time, time_step):
+    """Worker: rebuilds one chunk of satellites from TLE lines and batch-propagates it."""
+    satellites = [Satrec.twoline2rv(line1, line2) for line1, line2 in lines]
+    return propagate_satellites_batch(satellites, start_time, end_time, time_step)
+
+async def _fetch(client, norad_ids, texts, stop, queue_size):
+    """Stage 1: runs the chunked client in a thread and feeds responses into ``texts``.
+
+    The client submits no more than ``queue_size`` downloads ahead of this
+    stage, and the thread blocks while ``texts`` is full, so downloads wait
+    until parsing catches up. Setting ``stop`` ends the thread after its
+    next hand-off.
+    """
+    loop = asyncio.get_running_loop()
+
+    def pump():
+        chunks = client.iter_chunks(norad_ids, max_pending=queue_size)
+        try:
+            for index, text in chunks:
+                asyncio.run_coroutine_threadsafe(texts.put((index, text)), loop).result()
+                if stop.is_set():
+                    return
+        finally:
+            chunks.close()
+
+    try:
+        await loop.run_in_executor(None, pump)
+    finally:
+        if not stop.is_set():
+            await texts.put(None)
+
+async def _parse(texts, parsed, cache):
+    """Stage 2: parses each response as it arrives, optionally saving it in the TLE cache."""
+    while (item := await texts.get()) is not None:
+        index, text = item
+        satellites, _, report = parse_tle_text(text)
+        if cache is not None:
+            cache.store(((s.name, s.line1, s.line2) for s in satellites), time.time())
+        await parsed.put((index, satellites, report))
+    await parsed.put(None)
+
+async def _propagate(parsed, pool, start_time, grid_end, time_step, in_flight):
+    """Stage 3: hands each parsed chunk to the pool, with at most ``in_flight`` chunks queued."""
+    loop = asyncio.get_running_loop()
+    slots = asyncio.Semaphore(in_flight)
+    tasks = []
+
+    async def run(index, satellites, report):
+        try:
+            lines = [tle_lines(satellite) for satellite in satellites]
+            result = await loop.run_in_executor(
+                pool, _propagate_lines, lines, start_time, grid_end, time_step
+            )
+        finally:
+            slots.release()
+        return index, satellites, report, result
+
+    while (item := await parsed.get()) is not None:
+        await slots.acquire()
+        tasks.append(asyncio.ensure_future(run(*item)))
+    return await asyncio.gather(*tasks)
+
+async def fetch_and_propagate(norad_ids, start_time, end_time, coarse_step=COARSE_TIME_STEP,
+                              client=None, cache=None, workers=WORKERS,
+                              queue_size=PIPELINE_QUEUE_SIZE):
+    """Fetches, parses and coarse-propagates a catalog with the three stages overlapped.
+
+    Space-Track chunks are downloaded concurrently by ``client`` (the shared
+    ``get_client()`` one if not given), parsed as soon as each one arrives
+    and propagated on the covering coarse grid in a process pool of
+    ``workers`` (a thread when ``workers`` is 1) while later chunks are still
+    downloading. The queues between stages hold at most ``queue_size``
+    chunks, so a slow stage holds back the ones before it. With a
+    ``TLECache``, fetched element sets are stored in it as they arrive.
+
+    Returns ``(satellites, report, errors, positions, velocities)`` with the
+    arrays laid out like ``propagate_satellites_batch`` and satellites in
+    request-chunk order, ready for ``find_conjunctions_in_arrays``.
+    """
+    coarse_days = coarse_step / (24.0 * 60.0)
+    _, grid_end = covering_grid(start_time, end_time, coarse_days)
+    texts = asyncio.Queue(queue_size)
+    parsed = asyncio.Queue(queue_size)
+
+    client = client or get_client()
+    pool = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+    stop = threading.Event()
+    try:
+        with metrics.stage("pipeline"):
+            stages = [
+                asyncio.ensure_future(_fetch(client, norad_ids, texts, stop, queue_size)),
+                asyncio.ensure_future(_parse(texts, parsed, cache)),
+                asyncio.ensure_future(_propagate(
+                    parsed, pool, start_time, grid_end, coarse_days, max(workers, 1) + queue_size
+                )),
+            ]
+            try:
+                _, _, chunks = await asyncio.gather(*stages)
+            except BaseException:
+                # Unblock the download thread (it may be waiting on a full
+                # queue nobody reads any more), then wind every stage down
+                # before the error propagates.
+                stop.set()
+                for stage in stages[1:]:
+                    stage.cancel()
+                while not texts.empty():
+                    texts.get_nowait()
+                await asyncio.gather(*stages, return_exceptions=True)
+                raise
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+    chunks.sort(key=lambda chunk: chunk[0])
+    satellites = [satellite for chunk in chunks for satellite in chunk[1]]
+    report = {
+        "records": len(satellites),
+        "skipped": [entry for chunk in chunks for entry in chunk[2]["skipped"]],
+    }
+    if not chunks:
+        empty, _, _ = propagate_satellites_batch([], start_time, grid_end, coarse_days)
+        return satellites, report, empty, np.empty(empty.shape + (3,)), np.empty(empty.shape + (3,))
+    errors, positions, velocities = (
+        np.concatenate(column) for column in zip(*(chunk[3] for chunk in chunks))
+    )
+    return satellites, report, errors, positions, velocities
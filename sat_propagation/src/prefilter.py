@@ -0,0 +1,145 @@
+# src/prefilter.py
+
+import numpy as np
+
+def altitude_bands(satellites):
+    """Returns (perigee, apogee) altitude arrays in km from the Satrec elements."""
+    perigee = np.array([sat.altp * sat.radiusearthkm for sat in satellites], dtype=np.float64)
+    apogee = np.array([sat.alta * sat.radiusearthkm for sat in satellites], dtype=np.float64)
+    return perigee, apogee
+
+def bands_overlap(perigee, apogee, i, j, margin):
+    """Returns a mask of the (i, j) pairs whose altitude bands overlap within ``margin`` km."""
+    return (perigee[i] <= apogee[j] + margin) & (perigee[j] <= apogee[i] + margin)
+
+class BandFilter:
+    """Pair test for screening: keeps (i, j) pairs whose altitude bands overlap within ``margin`` km.
+
+    Picklable, so it can be handed to screening workers.
+    """
+
+    def __init__(self, perigee, apogee, margin):
+        self.perigee = perigee
+        self.apogee = apogee
+        self.margin = margin
+
+    def __call__(self, i, j):
+        return bands_overlap(self.perigee, self.apogee, i, j, self.margin)
+
+class PairFilter:
+    """Pair test for screening: keeps (i, j) pairs present in a prefilter pair list.
+
+    ``i``/``j`` are the prefilter output, sorted by i then j with i < j.
+    Pairs are tested in either order. Picklable, so it can be handed to
+    screening workers.
+    """
+
+    def __init__(self, n_sats, i, j):
+        self.n_sats = n_sats
+        self.keys = np.asarray(i, dtype=np.int64) * n_sats + np.asarray(j, dtype=np.int64)
+
+    def __call__(self, i, j):
+        keys = np.minimum(i, j) * self.n_sats + np.maximum(i, j)
+        if len(self.keys) == 0:
+            return np.zeros(len(keys), dtype=bool)
+        pos = np.minimum(np.searchsorted(self.keys, keys), len(self.keys) - 1)
+        return self.keys[pos] == keys
+
+def band_overlap_pairs(satellites, margin):
+    """Enumerates satellite pairs whose perigee/apogee bands overlap within ``margin`` km.
+
+    Bands are sorted by perigee so each object only looks forward over the
+    objects whose perigee starts below its own apogee plus the margin,
+    instead of testing all N^2 pairs. Returns ``(i, j)`` arrays with i < j,
+    sorted by i then j.
+    """
+    if len(satellites) < 2:
+        empty = np.empty(0, dtype=np.int64)
+        return empty, empty.copy()
+
+    perigee, apogee = altitude_bands(satellites)
+    order = np.argsort(perigee, kind="stable")
+    reach = np.searchsorted(perigee[order], apogee[order] + margin, side="right")
+
+    counts = np.maximum(reach - np.arange(len(order)) - 1, 0)
+    first = np.repeat(np.arange(len(order)), counts)
+    second = first + 1 + np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+
+    i, j = order[first], order[second]
+    i, j = np.minimum(i, j), np.maximum(i, j)
+    sort = np.lexsort((j, i))
+    return i[sort], j[sort]
+
+def _orbit_axes(satellites):
+    """Returns the perigee, in-plane and normal unit vectors plus semi-latus rectum and eccentricity."""
+    inclination = np.array([sat.inclo for sat in satellites])
+    node = np.array([sat.nodeo for sat in satellites])
+    perigee_arg = np.array([sat.argpo for sat in satellites])
+    eccentricity = np.array([sat.ecco for sat in satellites])
+    semi_major = np.array([sat.a * sat.radiusearthkm for sat in satellites])
+
+    cos_i, sin_i = np.cos(inclination), np.sin(inclination)
+    cos_n, sin_n = np.cos(node), np.sin(node)
+    cos_w, sin_w = np.cos(perigee_arg), np.sin(perigee_arg)
+    p_axis = np.stack([
+        cos_n * cos_w - sin_n * sin_w * cos_i,
+        sin_n * cos_w + cos_n * sin_w * cos_i,
+        sin_w * sin_i,
+    ], axis=1)
+    q_axis = np.stack([
+        -cos_n * sin_w - sin_n * cos_w * cos_i,
+        -sin_n * sin_w + cos_n * cos_w * cos_i,
+        cos_w * sin_i,
+    ], axis=1)
+    normal = np.cross(p_axis, q_axis)
+    semi_latus = semi_major * (1.0 - eccentricity**2)
+    return p_axis, q_axis, normal, semi_latus, eccentricity
+
+def orbit_paths_close(satellites, i, j, margin, min_relative_inclination=1e-3):
+    """Returns a mask of the (i, j) pairs whose orbital paths come within ``margin`` km.
+
+    Two non-coplanar orbits can only meet near the line where their planes
+    intersect, so the radial separation of the two paths at both ends of that
+    line is compared against the margin. Nearly coplanar pairs (relative
+    inclination under ``min_relative_inclination`` radians) are always kept.
+    The margin must cover the drift of the node and perigee over the window.
+    """
+    p_axis, q_axis, normal, semi_latus, eccentricity = _orbit_axes(satellites)
+    line = np.cross(normal[i], normal[j])
+    sin_relative = np.linalg.norm(line, axis=1)
+    coplanar = sin_relative < min_relative_inclination
+    line = line / np.where(coplanar, 1.0, sin_relative)[:, None]
+
+    def radius_along(k, direction):
+        anomaly = np.arctan2(
+            np.einsum("ij,ij->i", direction, q_axis[k]),
+            np.einsum("ij,ij->i", direction, p_axis[k]),
+        )
+        return semi_latus[k] / (1.0 + eccentricity[k] * np.cos(anomaly))
+
+    ascending = np.abs(radius_along(i, line) - radius_along(j, line))
+    descending = np.abs(radius_along(i, -line) - radius_along(j, -line))
+    return coplanar | (np.minimum(ascending, descending) <= margin)
+
+def prefilter_pairs(satellites, threshold, margin, orbit_geometry=False):
+    """Runs the element-based prefilter stage ahead of any propagation.
+
+    Keeps only pairs whose altitude bands overlap within ``threshold + margin``
+    km and, when ``orbit_geometry`` is set, whose orbital paths also come that
+    close. Returns ``(i, j, report)`` where ``report`` counts the pairs
+    removed by each filter.
+    """
+    n = len(satellites)
+    total = n * (n - 1) // 2
+    i, j = band_overlap_pairs(satellites, threshold + margin)
+    report = {
+        "total_pairs": total,
+        "altitude_eliminated": total - len(i),
+        "geometry_eliminated": 0,
+    }
+    if orbit_geometry and len(i):
+        keep = orbit_paths_close(satellites, i, j, threshold + margin)
+        report["geometry_eliminated"] = int(len(i) - keep.sum())
+        i, j = i[keep], j[keep]
+    report["remaining_pairs"] = len(i)
+    return i, j, report
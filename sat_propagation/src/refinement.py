@@ -0,0 +1,410 @@
+# src/refinement.py
+
+import math
+import numpy as np
+from sgp4.api import SatrecArray
+from src.collision_analysis import (
+    covering_grid,
+    propagate_satellites_batch,
+    first_failures,
+    live_objects,
+)
+from src.config import (
+    COARSE_TIME_STEP,
+    COARSE_MAX_DISTANCE,
+    FINE_TIME_STEP,
+    TCA_TOLERANCE,
+    MAX_RELATIVE_SPEED,
+    PREFILTER_MARGIN,
+    WORKERS,
+    WINDOW_LENGTH,
+)
+from src.ephemeris_store import catalog_hash, conjunction_arrays_from_store
+from src.metrics import metrics
+from src.parallel import propagate_satellites_parallel, conjunction_arrays_parallel
+from src.prefilter import BandFilter, PairFilter, altitude_bands
+from src.screening import conjunction_arrays
+
+SECONDS_PER_DAY = 86400.0
+
+# Upper bound on the relative acceleration of two orbiting objects (about 2 g
+# in low orbit) in km/s^2, used to widen the coarse screening distance.
+_MAX_RELATIVE_ACCEL = 0.02
+
+# Bound on the gravity-gradient magnitude (3 mu / r^3 at 100 km altitude) in
+# 1/s^2. The relative acceleration of two objects is at most this times their
+# separation, which bounds how far their relative path bends within a step.
+_TIDAL_GRADIENT = 3.0 * 398600.4418 / 6478.0**3
+
+def coarse_distance(threshold, step_seconds, max_relative_speed=MAX_RELATIVE_SPEED):
+    """Returns the screening distance that cannot miss an approach between samples.
+
+    The closest approach always lies within half a step of some sample, so an
+    object pair can only get under ``threshold`` if, at that sample, it is
+    closer than ``threshold`` plus the distance it can close in half a step.
+    """
+    half_step = step_seconds / 2.0
+    return threshold + max_relative_speed * half_step + 0.5 * _MAX_RELATIVE_ACCEL * half_step**2
+
+def screening_step(threshold, coarse_step=COARSE_TIME_STEP, max_relative_speed=MAX_RELATIVE_SPEED,
+                   max_distance=COARSE_MAX_DISTANCE):
+    """Returns the coarse step (minutes) to screen at: ``coarse_step`` or shorter.
+
+    The number of samples the screening keeps grows with the square of
+    ``coarse_distance``, so the step is shortened (to whole seconds) until
+    that distance is under ``max_distance``. Thresholds close to or above
+    ``max_distance`` are allowed twice the threshold instead.
+    """
+    if coarse_distance(threshold, coarse_step * 60.0, max_relative_speed) <= max_distance:
+        return coarse_step
+    reach = max(max_distance - threshold, threshold)
+    # Solve max_relative_speed * h + accel / 2 * h^2 = reach for the half step h.
+    half_step = (math.sqrt(max_relative_speed**2 + 2.0 * _MAX_RELATIVE_ACCEL * reach)
+                 - max_relative_speed) / _MAX_RELATIVE_ACCEL
+    return max(math.floor(2.0 * half_step), 1) / 60.0
+
+def pair_filter(satellites, threshold, pairs=None):
+    """Returns the ``keep`` test the screening stage applies before measuring any pair.
+
+    ``pairs`` is an optional ``(i, j)`` list from the prefilter stage, sorted
+    by i then j. Without it, pairs whose altitude bands never come within
+    ``threshold`` plus ``PREFILTER_MARGIN`` are dropped instead. The margin
+    matters: mean-element perigee and apogee do not bound the osculating
+    radius SGP4 returns, which can sit several km outside them.
+    """
+    if pairs is not None:
+        return PairFilter(len(satellites), *pairs)
+    perigee, apogee = altitude_bands(satellites)
+    return BandFilter(perigee, apogee, threshold + PREFILTER_MARGIN)
+
+def _count_errors(errors):
+    if metrics.enabled:
+        metrics.count("propagation_errors", np.count_nonzero(errors))
+        metrics.count("objects_failed", np.count_nonzero(first_failures(errors)[1]))
+
+def _subset_pairs(pairs, alive, n_sats):
+    """Re-indexes sorted prefilter ``pairs`` onto the sorted ``alive`` subset of the catalog."""
+    if pairs is None:
+        return None
+    position = np.full(n_sats, -1, dtype=np.int64)
+    position[alive] = np.arange(len(alive))
+    i, j = position[pairs[0]], position[pairs[1]]
+    keep = (i >= 0) & (j >= 0)
+    return i[keep], j[keep]
+
+def coarse_candidates(satellites, errors, positions, velocities, threshold, step_seconds,
+                      max_relative_speed=MAX_RELATIVE_SPEED, pairs=None, screened=None):
+    """Runs the coarse screening pass on batch arrays.
+
+    Returns ``(sat1, sat2, time_step)`` arrays for samples where the pair is
+    close enough that an approach under ``threshold`` may occur within half a
+    step. Only the pairs passed by ``pair_filter(satellites, threshold,
+    pairs)`` are screened. ``screened`` takes the ``conjunction_arrays``
+    output at ``coarse_distance`` with that filter when the caller has
+    already computed it (e.g. in parallel).
+    """
+    if screened is None:
+        distance = coarse_distance(threshold, step_seconds, max_relative_speed)
+        screened = conjunction_arrays(positions, errors, distance, pair_filter(satellites, threshold, pairs))
+    sat1, sat2, steps, distances = screened
+    metrics.count("samples_screened", len(sat1))
+
+    # Tighten the bound per sample: extrapolate the relative motion in a
+    # straight line over half a step either side, then allow for how far the
+    # differential gravity between the two objects can bend it.
+    half_step = step_seconds / 2.0
+    dr = positions[sat1, steps] - positions[sat2, steps]
+    dv = velocities[sat1, steps] - velocities[sat2, steps]
+    speed_sq = np.einsum("ij,ij->i", dv, dv)
+    closing = -np.einsum("ij,ij->i", dr, dv)
+    t_min = np.clip(np.divide(closing, speed_sq, out=np.zeros_like(closing), where=speed_sq > 0),
+                    -half_step, half_step)
+    linear_miss = np.linalg.norm(dr + dv * t_min[:, None], axis=1)
+    bending = 0.5 * _TIDAL_GRADIENT * half_step**2 * (distances + np.sqrt(speed_sq) * half_step)
+    keep = linear_miss - bending < threshold
+    metrics.count("samples_pruned", len(keep) - np.count_nonzero(keep))
+    return sat1[keep], sat2[keep], steps[keep]
+
+def candidate_windows(sat1, sat2, steps, n_steps):
+    """Groups coarse candidates into per-pair windows of coarse step indices.
+
+    Each flagged sample expands to the step on either side of it; windows of
+    the same pair that touch or overlap are merged so every approach is
+    refined exactly once. Returns a list of ``(sat1, sat2, first, last)``.
+    """
+    windows = []
+    for i, j, t in zip(sat1.tolist(), sat2.tolist(), steps.tolist()):
+        first, last = max(t - 1, 0), min(t + 1, n_steps - 1)
+        if windows and windows[-1][:2] == (i, j) and first <= windows[-1][3]:
+            windows[-1] = (i, j, windows[-1][2], last)
+        else:
+            windows.append((i, j, first, last))
+    return windows
+
+def _relative_state(sat_a, sat_b, jd, fr):
+    """Returns the relative position and velocity of two satellites, or None on error."""
+    error_a, r_a, v_a = sat_a.sgp4(jd, fr)
+    error_b, r_b, v_b = sat_b.sgp4(jd, fr)
+    if error_a != 0 or error_b != 0:
+        return None
+    return np.subtract(r_a, r_b), np.subtract(v_a, v_b)
+
+def _bisect_range_rate(sat_a, sat_b, jd, lo, hi, tolerance):
+    """Bisects the range-rate root in [lo, hi], where it goes from negative to positive."""
+    while hi - lo > tolerance:
+        mid = 0.5 * (lo + hi)
+        state = _relative_state(sat_a, sat_b, jd, mid)
+        if state is None:
+            break
+        dr, dv = state
+        if np.dot(dr, dv) < 0:
+            lo = mid
+        else:
+            hi = mid
+    return 0.5 * (lo + hi)
+
+def refine_window(sat_a, sat_b, jd, fr_start, fr_end, fine_step, tolerance,
+                  open_start=False, open_end=False):
+    """Finds the closest approaches of two satellites inside one time window.
+
+    The pair is re-propagated at ``fine_step`` (days) to locate each interval
+    where the range-rate changes sign from closing to opening, and that root
+    is then bisected down to ``tolerance`` (days). ``open_start`` and
+    ``open_end`` mark window edges that are also edges of the screening span,
+    where a still-closing (or already-opening) pair has its minimum at the
+    edge itself. Returns a list of ``(fr, distance, relative_speed)``.
+    """
+    n_samples = max(int(math.ceil((fr_end - fr_start) / fine_step)), 1) + 1
+    fr = np.linspace(fr_start, fr_end, n_samples)
+    errors, r, v = SatrecArray([sat_a, sat_b]).sgp4(np.full(n_samples, jd), fr)
+    valid = (errors == 0).all(axis=0)
+    range_rate = np.einsum("ij,ij->i", r[0] - r[1], v[0] - v[1])
+
+    roots = []
+    crossing = np.flatnonzero(
+        valid[:-1] & valid[1:] & (range_rate[:-1] < 0) & (range_rate[1:] >= 0)
+    )
+    for k in crossing.tolist():
+        roots.append(_bisect_range_rate(sat_a, sat_b, jd, fr[k], fr[k + 1], tolerance))
+    if open_start and valid[0] and range_rate[0] > 0:
+        roots.append(fr[0])
+    if open_end and valid[-1] and range_rate[-1] < 0:
+        roots.append(fr[-1])
+
+    approaches = []
+    for root in sorted(roots):
+        state = _relative_state(sat_a, sat_b, jd, root)
+        if state is None:
+            continue
+        dr, dv = state
+        approaches.append((root, float(np.linalg.norm(dr)), float(np.linalg.norm(dv))))
+    return approaches
+
+def find_conjunctions(satellites, start_time, end_time, threshold,
+                      coarse_step=COARSE_TIME_STEP, fine_step=FINE_TIME_STEP,
+                      tolerance=TCA_TOLERANCE, max_relative_speed=MAX_RELATIVE_SPEED,
+                      pairs=None, workers=WORKERS):
+    """Multi-stage conjunction search with time-of-closest-approach refinement.
+
+    1. Propagate the whole catalog once at ``coarse_step`` minutes, or at the
+       shorter ``screening_step`` that keeps the screening distance small.
+    2. Screen each sample with a distance widened by how far a pair can close
+       in half a step, keeping only the prefiltered ``pairs`` if given (or
+       else pairs whose altitude bands overlap).
+    3. Re-propagate only the flagged pairs around the flagged samples at
+       ``fine_step`` seconds and root-find the range-rate for the exact TCA.
+
+    Returns a list of ``{"sat1", "sat2", "tca", "distance", "relative_speed"}``
+    records where ``tca`` is a Julian date, sorted by pair then TCA. With
+    ``workers`` > 1 the coarse propagation and screening run in a process
+    pool and produce the same result as the serial path.
+    """
+    coarse_step = screening_step(threshold, coarse_step, max_relative_speed)
+    coarse_days = coarse_step / (24.0 * 60.0)
+
+    # Extend the coarse grid to the first sample at or past end_time so the
+    # tail of the span is covered; refinement is clipped back to end_time.
+    span = end_time - start_time
+    n_steps, grid_end = covering_grid(start_time, end_time, coarse_days)
+    step_seconds = coarse_step * 60.0
+    if workers > 1:
+        distance = coarse_distance(threshold, step_seconds, max_relative_speed)
+        with metrics.stage("propagate"):
+            ephemeris = propagate_satellites_parallel(
+                satellites, start_time, grid_end, coarse_days, workers
+            )
+        with ephemeris, metrics.stage("screen"):
+            _count_errors(ephemeris.errors)
+            keep = pair_filter(satellites, threshold, pairs)
+            screened = conjunction_arrays_parallel(ephemeris, distance, workers, keep)
+            sat1, sat2, steps = coarse_candidates(
+                satellites, ephemeris.errors, ephemeris.positions, ephemeris.velocities,
+                threshold, step_seconds, max_relative_speed, pairs, screened,
+            )
+    else:
+        with metrics.stage("propagate"):
+            errors, positions, velocities = propagate_satellites_batch(
+                satellites, start_time, grid_end, coarse_days
+            )
+        _count_errors(errors)
+        with metrics.stage("screen"):
+            sat1, sat2, steps = coarse_candidates(
+                satellites, errors, positions, velocities, threshold,
+                step_seconds, max_relative_speed, pairs,
+            )
+
+    return refine_candidates(
+        satellites, start_time, span, coarse_days, n_steps, sat1, sat2, steps,
+        threshold, fine_step, tolerance,
+    )
+
+def iter_conjunctions(satellites, start_time, end_time, threshold, window=WINDOW_LENGTH,
+                      coarse_step=COARSE_TIME_STEP, fine_step=FINE_TIME_STEP,
+                      tolerance=TCA_TOLERANCE, max_relative_speed=MAX_RELATIVE_SPEED,
+                      pairs=None, workers=WORKERS, dropped=None):
+    """Yields conjunctions over a long horizon one time window at a time.
+
+    The span is cut into chunks of ``window`` hours on the coarse grid, and
+    ``find_conjunctions`` runs on each chunk widened by one coarse step on
+    either side. The overlap lets approaches near a chunk boundary be
+    bracketed and refined in full. Each chunk only emits the events whose
+    TCA falls inside its own part of the span, so none are lost or repeated.
+    Memory use depends on the window length, not on the horizon. Events are
+    yielded in TCA order within each chunk.
+
+    Objects that hit a terminal SGP4 error (decay, degenerate elements) by
+    the start of a chunk are left out of it and every later chunk. If
+    ``dropped`` is a list, ``(index, error_code, julian_date)`` is appended
+    to it for each of them.
+    """
+    coarse_step = screening_step(threshold, coarse_step, max_relative_speed)
+    coarse_days = coarse_step / (24.0 * 60.0)
+    chunk_steps = max(int(round(window * 60.0 / coarse_step)), 1)
+    alive = np.arange(len(satellites))
+    lo = 0
+    while start_time + lo * coarse_days < end_time:
+        chunk_start = start_time + max(lo - 1, 0) * coarse_days
+        own_start = start_time + lo * coarse_days
+        own_end = min(start_time + (lo + chunk_steps) * coarse_days, end_time)
+        final = own_end >= end_time
+
+        alive, failed, codes = live_objects(satellites, alive, chunk_start)
+        if len(failed):
+            metrics.count("objects_dropped", len(failed))
+            if dropped is not None:
+                dropped.extend((k, code, chunk_start) for k, code in zip(failed.tolist(), codes.tolist()))
+        if len(alive) == len(satellites):
+            subset, subset_pairs = satellites, pairs
+        else:
+            subset = [satellites[k] for k in alive.tolist()]
+            subset_pairs = _subset_pairs(pairs, alive, len(satellites))
+
+        chunk = find_conjunctions(
+            subset, chunk_start, min(own_end + coarse_days, end_time),
+            threshold, coarse_step, fine_step, tolerance, max_relative_speed, subset_pairs, workers,
+        )
+        for conjunction in sorted(chunk, key=lambda c: c["tca"]):
+            if own_start <= conjunction["tca"] and (conjunction["tca"] < own_end or final):
+                if subset is not satellites:
+                    conjunction["sat1"] = int(alive[conjunction["sat1"]])
+                    conjunction["sat2"] = int(alive[conjunction["sat2"]])
+                yield conjunction
+        lo += chunk_steps
+
+def refine_candidates(satellites, start_time, span, coarse_days, n_steps, sat1, sat2, steps,
+                      threshold, fine_step=FINE_TIME_STEP, tolerance=TCA_TOLERANCE):
+    """Refines coarse candidates on a grid of ``n_steps`` samples ``coarse_days`` apart.
+
+    ``span`` (days from ``start_time``) clips the last window. Returns the
+    records described in ``find_conjunctions``.
+    """
+    fine_days = fine_step / SECONDS_PER_DAY
+    tolerance_days = tolerance / SECONDS_PER_DAY
+    windows = candidate_windows(sat1, sat2, steps, n_steps)
+    metrics.count("candidate_windows", len(windows))
+    conjunctions = []
+    with metrics.stage("refine"):
+        for i, j, first, last in windows:
+            approaches = refine_window(
+                satellites[i], satellites[j], start_time,
+                first * coarse_days, min(last * coarse_days, span), fine_days, tolerance_days,
+                open_start=first == 0, open_end=last == n_steps - 1,
+            )
+            for fr, distance, relative_speed in approaches:
+                if distance < threshold:
+                    conjunctions.append({
+                        "sat1": i,
+                        "sat2": j,
+                        "tca": start_time + fr,
+                        "distance": distance,
+                        "relative_speed": relative_speed,
+                    })
+    metrics.count("events_found", len(conjunctions))
+    return conjunctions
+
+def find_conjunctions_in_store(satellites, store, threshold, fine_step=FINE_TIME_STEP,
+                               tolerance=TCA_TOLERANCE, max_relative_speed=MAX_RELATIVE_SPEED,
+                               pairs=None, start_time=None, end_time=None):
+    """Runs the coarse-to-fine search using a stored ephemeris as the coarse grid.
+
+    The coarse pass reads the memory-mapped store a chunk of steps at a time
+    instead of propagating, so screening can be repeated with a different
+    ``threshold`` at the cost of the refinement stage only. ``satellites``
+    must be the catalog the store was written from. ``start_time`` and
+    ``end_time`` (Julian dates, defaulting to the stored window) select the
+    part of the store to screen; only events with a TCA inside it are
+    returned.
+    """
+    if catalog_hash(satellites) != store.catalog:
+        raise ValueError(f"{store.path} was propagated from different element sets")
+    start_time = store.start_time if start_time is None else start_time
+    end_time = store.end_time if end_time is None else end_time
+    if not store.covers(start_time, end_time):
+        raise ValueError(f"{store.path} does not cover the requested window")
+
+    # Coarse samples bracketing the requested window.
+    first = int(math.floor((start_time - store.start_time) / store.time_step + 1e-9))
+    last = min(int(math.ceil((end_time - store.start_time) / store.time_step - 1e-9)), store.n_steps - 1)
+    origin = store.start_time + first * store.time_step
+
+    step_seconds = store.time_step * SECONDS_PER_DAY
+    distance = coarse_distance(threshold, step_seconds, max_relative_speed)
+    with metrics.stage("screen"):
+        keep = pair_filter(satellites, threshold, pairs)
+        screened = conjunction_arrays_from_store(store, distance, first=first, stop=last + 1, keep=keep)
+        sat1, sat2, steps = coarse_candidates(
+            satellites, store.errors, store.positions, store.velocities, threshold,
+            step_seconds, max_relative_speed, pairs, screened,
+        )
+    conjunctions = refine_candidates(
+        satellites, origin, end_time - origin, store.time_step, last - first + 1,
+        sat1, sat2, steps - first, threshold, fine_step, tolerance,
+    )
+    return [c for c in conjunctions if c["tca"] >= start_time]
+
+def find_conjunctions_in_arrays(satellites, start_time, end_time, errors, positions, velocities,
+                                threshold, coarse_step=COARSE_TIME_STEP, fine_step=FINE_TIME_STEP,
+                                tolerance=TCA_TOLERANCE, max_relative_speed=MAX_RELATIVE_SPEED,
+                                pairs=None):
+    """Runs the screening and refinement stages on an already propagated coarse grid.
+
+    ``errors``/``positions``/``velocities`` must cover ``covering_grid`` of
+    the span at ``coarse_step`` minutes, as produced by
+    ``pipeline.fetch_and_propagate``; use ``screening_step`` for the step.
+    Returns the records described in ``find_conjunctions``.
+    """
+    coarse_days = coarse_step / (24.0 * 60.0)
+    n_steps, _ = covering_grid(start_time, end_time, coarse_days)
+    if errors.shape[1] != n_steps:
+        raise ValueError(f"Expected {n_steps} coarse samples per object, got {errors.shape[1]}")
+
+    _count_errors(errors)
+    with metrics.stage("screen"):
+        sat1, sat2, steps = coarse_candidates(
+            satellites, errors, positions, velocities, threshold,
+            coarse_step * 60.0, max_relative_speed, pairs,
+        )
+    return refine_candidates(
+        satellites, start_time, end_time - start_time, coarse_days, n_steps, sat1, sat2, steps,
+        threshold, fine_step, tolerance,
+    )
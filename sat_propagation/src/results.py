@@ -0,0 +1,149 @@
+# src/results.py
+
+import csv
+import math
+import os
+from datetime import datetime, timezone
+import numpy as np
+
+_J2000 = np.datetime64("2000-01-01T12:00:00", "us")
+
+def jd_to_datetime64(jd):
+    """Converts Julian dates (scalar or array) to numpy datetime64[us] UTC."""
+    offset = np.round((np.asarray(jd, dtype=np.float64) - 2451545.0) * 86400e6)
+    return _J2000 + offset.astype("timedelta64[us]")
+
+class ConjunctionTable:
+    """Columnar screening result, one row per conjunction.
+
+    Columns are numpy arrays: ``sat1``/``sat2`` (catalog indices),
+    ``norad1``/``norad2``, ``name1``/``name2``, ``tca`` (Julian date),
+    ``distance`` (km), ``relative_speed`` (km/s) and ``pc`` (NaN until a
+    probability of collision has been computed).
+    """
+
+    COLUMNS = ("sat1", "sat2", "norad1", "norad2", "name1", "name2",
+               "tca", "distance", "relative_speed", "pc")
+
+    def __init__(self, satellites, sat1, sat2, tca, distance, relative_speed, pc=None):
+        self.sat1 = np.asarray(sat1, dtype=np.int64)
+        self.sat2 = np.asarray(sat2, dtype=np.int64)
+        self.tca = np.asarray(tca, dtype=np.float64)
+        self.distance = np.asarray(distance, dtype=np.float64)
+        self.relative_speed = np.asarray(relative_speed, dtype=np.float64)
+        self.pc = np.full(len(self.sat1), np.nan) if pc is None else np.asarray(pc, dtype=np.float64)
+
+        norad = np.fromiter((s.satnum for s in satellites), dtype=np.int64, count=len(satellites))
+        names = np.array([s.name for s in satellites], dtype=object)
+        self.norad1, self.norad2 = norad[self.sat1], norad[self.sat2]
+        self.name1, self.name2 = names[self.sat1], names[self.sat2]
+
+    @classmethod
+    def from_records(cls, satellites, conjunctions):
+        """Builds a table from ``find_conjunctions``-style dicts (``pc`` is optional)."""
+        def column(key, dtype):
+            return np.fromiter((c[key] for c in conjunctions), dtype=dtype, count=len(conjunctions))
+
+        pc = column("pc", np.float64) if conjunctions and "pc" in conjunctions[0] else None
+        return cls(
+            satellites, column("sat1", np.int64), column("sat2", np.int64), column("tca", np.float64),
+            column("distance", np.float64), column("relative_speed", np.float64), pc,
+        )
+
+    def __len__(self):
+        return len(self.sat1)
+
+    def take(self, rows):
+        """Returns a new table with the given rows (index array or mask), in that order."""
+        table = object.__new__(ConjunctionTable)
+        for column in self.COLUMNS:
+            setattr(table, column, getattr(self, column)[rows])
+        return table
+
+    def sorted_by_risk(self):
+        """Returns the rows ordered by decreasing Pc, then by miss distance; missing Pc last."""
+        return self.take(np.lexsort((self.distance, -np.nan_to_num(self.pc, nan=-1.0))))
+
+    def tca_utc(self):
+        """Returns the TCAs as datetime64[us] UTC."""
+        return jd_to_datetime64(self.tca)
+
+def write_csv(table, path):
+    """Writes the table as CSV with an ISO 8601 ``tca_utc`` column next to the Julian date."""
+    tca_utc = np.datetime_as_string(table.tca_utc(), unit="ms")
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(("norad1", "name1", "norad2", "name2", "tca", "tca_utc",
+                         "distance_km", "relative_speed_km_s", "pc"))
+        writer.writerows(zip(
+            table.norad1.tolist(), table.name1.tolist(), table.norad2.tolist(), table.name2.tolist(),
+            table.tca.tolist(), tca_utc.tolist(), table.distance.tolist(),
+            table.relative_speed.tolist(), table.pc.tolist(),
+        ))
+
+def write_parquet(table, path):
+    """Writes the table as Parquet. Needs the optional ``pyarrow`` package."""
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise Exception("Writing Parquet results requires pyarrow (pip install pyarrow)")
+
+    pq.write_table(pa.table({
+        "norad1": table.norad1,
+        "name1": pa.array(table.name1.tolist(), pa.string()),
+        "norad2": table.norad2,
+        "name2": pa.array(table.name2.tolist(), pa.string()),
+        "tca": table.tca,
+        "tca_utc": pa.array(table.tca_utc(), pa.timestamp("us", tz="UTC")),
+        "distance_km": table.distance,
+        "relative_speed_km_s": table.relative_speed,
+        "pc": table.pc,
+    }), path)
+
+def write_cdm(table, path, originator="sat_propagation"):
+    """Writes one CCSDS CDM-style key = value block per conjunction.
+
+    This follows the layout of the CDM KVN format for the fields the
+    screening produces (TCA, miss distance, relative speed, Pc and the two
+    object designators); it does not carry state vectors or covariances.
+    """
+    created = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S")
+    tca_utc = np.datetime_as_string(table.tca_utc(), unit="ms")
+    blocks = []
+    for k, (norad1, name1, norad2, name2, tca, distance, speed, pc) in enumerate(zip(
+        table.norad1.tolist(), table.name1.tolist(), table.norad2.tolist(), table.name2.tolist(),
+        tca_utc.tolist(), table.distance.tolist(), table.relative_speed.tolist(), table.pc.tolist(),
+    )):
+        lines = [
+            "CCSDS_CDM_VERS = 1.0",
+            f"CREATION_DATE = {created}",
+            f"ORIGINATOR = {originator}",
+            f"MESSAGE_ID = {created}_{k:06d}",
+            f"TCA = {tca}",
+            f"MISS_DISTANCE = {distance * 1000.0:.3f} [m]",
+            f"RELATIVE_SPEED = {speed * 1000.0:.3f} [m/s]",
+        ]
+        if not math.isnan(pc):
+            lines.append(f"COLLISION_PROBABILITY = {pc:.6e}")
+        for label, norad, name in (("OBJECT1", norad1, name1), ("OBJECT2", norad2, name2)):
+            lines.extend((
+                f"OBJECT = {label}",
+                f"OBJECT_DESIGNATOR = {norad}",
+                "CATALOG_NAME = SATCAT",
+                f"OBJECT_NAME = {name}",
+                "EPHEMERIS_NAME = NONE",
+                "REF_FRAME = TEME",
+            ))
+        blocks.append("\n".join(lines))
+    with open(path, "w") as f:
+        f.write("\n\n".join(blocks) + ("\n" if blocks else ""))
+
+WRITERS = {".csv": write_csv, ".parquet": write_parquet, ".cdm": write_cdm}
+
+def write_results(table, path):
+    """Writes the table in the format implied by the file extension (.csv, .parquet or .cdm)."""
+    extension = os.path.splitext(path)[1].lower()
+    if extension not in WRITERS:
+        raise ValueError(f"Unknown results format {extension!r}; use one of {', '.join(WRITERS)}")
+    WRITERS[extension](table, path)
@@ -0,0 +1,228 @@
+# src/screening.py
+
+import numpy as np
+
+# Bits per axis when packing integer cell coordinates into a single int64 key.
+_CELL_BITS = 21
+# Largest cell index we hand out, leaving room for the +1 neighbour and the 0 guard.
+_MAX_CELL = (1 << _CELL_BITS) - 2
+
+# Forward half of the 26-cell neighbourhood. Together with the cell itself this
+# visits every pair of adjacent cells exactly once.
+_HALF_NEIGHBOURS = np.array(
+    [
+        (dx, dy, dz)
+        for dx in (-1, 0, 1)
+        for dy in (-1, 0, 1)
+        for dz in (-1, 0, 1)
+        if (dx, dy, dz) > (0, 0, 0)
+    ],
+    dtype=np.int64,
+)
+
+def _cell_keys(cells):
+    """Packs (n, 3) non-negative integer cell coordinates into int64 keys."""
+    return (cells[:, 0] << (2 * _CELL_BITS)) | (cells[:, 1] << _CELL_BITS) | cells[:, 2]
+
+def _expand_blocks(a_start, a_count, b_start, b_count):
+    """Enumerates every (a, b) index pair for each pair of sorted-array blocks."""
+    sizes = a_count * b_count
+    total = int(sizes.sum())
+    if total == 0:
+        empty = np.empty(0, dtype=np.int64)
+        return empty, empty
+    block = np.repeat(np.arange(len(sizes)), sizes)
+    local = np.arange(total) - np.repeat(np.cumsum(sizes) - sizes, sizes)
+    pa = a_start[block] + local // b_count[block]
+    pb = b_start[block] + local % b_count[block]
+    return pa, pb
+
+def _bin_points(points, cell_size):
+    """Sorts points into grid cells and returns the per-cell layout."""
+    lo = points.min(axis=0)
+    cells = np.floor((points - lo) / cell_size).astype(np.int64) + 1
+    keys = _cell_keys(cells)
+    order = np.argsort(keys, kind="stable")
+    cell_keys, starts, counts = np.unique(keys[order], return_index=True, return_counts=True)
+    return cells, order, cell_keys, starts, counts
+
+def _grid_cell_size(points, threshold):
+    """Returns a cell edge >= threshold that keeps cell indices within the key width."""
+    span = float((points.max(axis=0) - points.min(axis=0)).max())
+    return max(threshold, span / (_MAX_CELL - 1))
+
+def pairs_within(points, threshold, keep=None):
+    """Finds all index pairs (i < j) of ``points`` closer than ``threshold``.
+
+    Points are binned into a uniform grid whose cells are at least
+    ``threshold`` wide, so only pairs that share a cell or sit in adjacent
+    cells can be close enough. ``keep``, if given, maps candidate ``(i, j)``
+    index arrays to a mask; pairs it rejects are dropped before any distance
+    is computed. Returns ``(i, j, distance)`` arrays.
+    """
+    points = np.asarray(points, dtype=np.float64)
+    if len(points) < 2:
+        empty = np.empty(0, dtype=np.int64)
+        return empty, empty.copy(), np.empty(0)
+
+    cell_size = _grid_cell_size(points, threshold)
+    cells, order, cell_keys, starts, counts = _bin_points(points, cell_size)
+    cell_coords = cells[order[starts]]
+
+    # Pairs inside the same cell.
+    crowded = counts > 1
+    pa, pb = _expand_blocks(starts[crowded], counts[crowded], starts[crowded], counts[crowded])
+    ordered = pa < pb
+    first, second = [pa[ordered]], [pb[ordered]]
+
+    # Pairs across each forward neighbour offset.
+    for offset in _HALF_NEIGHBOURS:
+        neighbour_keys = _cell_keys(cell_coords + offset)
+        pos = np.searchsorted(cell_keys, neighbour_keys)
+        pos_clipped = np.minimum(pos, len(cell_keys) - 1)
+        found = (pos < len(cell_keys)) & (cell_keys[pos_clipped] == neighbour_keys)
+        if not found.any():
+            continue
+        other = pos[found]
+        pa, pb = _expand_blocks(starts[found], counts[found], starts[other], counts[other])
+        first.append(pa)
+        second.append(pb)
+
+    i = order[np.concatenate(first)]
+    j = order[np.concatenate(second)]
+    if keep is not None:
+        wanted = keep(i, j)
+        i, j = i[wanted], j[wanted]
+    distance = np.linalg.norm(points[i] - points[j], axis=1)
+    close = distance < threshold
+    i, j, distance = i[close], j[close], distance[close]
+    return np.minimum(i, j), np.maximum(i, j), distance
+
+# The full 27-cell neighbourhood, used when querying individual points.
+_ALL_NEIGHBOURS = np.array(
+    [(dx, dy, dz) for dx in (-1, 0, 1) for dy in (-1, 0, 1) for dz in (-1, 0, 1)],
+    dtype=np.int64,
+)
+
+def pairs_near(points, query, threshold, keep=None):
+    """Finds all points closer than ``threshold`` to each of the ``query`` indices.
+
+    Only the neighbourhood of the query points is searched, so the cost
+    scales with the number of queries rather than with all pairs. ``keep``
+    filters candidate pairs as in ``pairs_within``. Returns ``(i, j,
+    distance)`` arrays with i < j; a pair of two query points is reported
+    once.
+    """
+    points = np.asarray(points, dtype=np.float64)
+    query = np.asarray(query, dtype=np.int64)
+    if len(points) < 2 or len(query) == 0:
+        empty = np.empty(0, dtype=np.int64)
+        return empty, empty.copy(), np.empty(0)
+
+    cell_size = _grid_cell_size(points, threshold)
+    cells, order, cell_keys, starts, counts = _bin_points(points, cell_size)
+    query_cells = cells[query]
+    ones = np.ones(len(query), dtype=np.int64)
+
+    first, second = [], []
+    for offset in _ALL_NEIGHBOURS:
+        neighbour_keys = _cell_keys(query_cells + offset)
+        pos = np.searchsorted(cell_keys, neighbour_keys)
+        pos_clipped = np.minimum(pos, len(cell_keys) - 1)
+        found = (pos < len(cell_keys)) & (cell_keys[pos_clipped] == neighbour_keys)
+        if not found.any():
+            continue
+        other = pos[found]
+        pa, pb = _expand_blocks(query[found], ones[found], starts[other], counts[other])
+        first.append(pa)
+        second.append(order[pb])
+
+    if not first:
+        empty = np.empty(0, dtype=np.int64)
+        return empty, empty.copy(), np.empty(0)
+    i = np.concatenate(first)
+    j = np.concatenate(second)
+    if keep is not None:
+        wanted = keep(i, j)
+        i, j = i[wanted], j[wanted]
+    distance = np.linalg.norm(points[i] - points[j], axis=1)
+    close = (distance < threshold) & (i != j)
+    i, j = np.minimum(i[close], j[close]), np.maximum(i[close], j[close])
+    _, unique = np.unique(i * len(points) + j, return_index=True)
+    return i[unique], j[unique], distance[close][unique]
+
+def _keep_valid(keep, valid):
+    """Adapts a ``keep`` test on satellite indices to indices into the ``valid`` subset."""
+    if keep is None:
+        return None
+    return lambda i, j: keep(valid[i], valid[j])
+
+def merge_hits(results):
+    """Merges ``(sat1, sat2, time_step, distance)`` hit lists into one, sorted by sat1, sat2, then step.
+
+    Used to combine the per-step, per-chunk or per-worker screening results.
+    """
+    if not results:
+        empty = np.empty(0, dtype=np.int64)
+        return empty, empty.copy(), empty.copy(), np.empty(0)
+    sat1, sat2, steps, distances = (np.concatenate(column) for column in zip(*results))
+    order = np.lexsort((steps, sat2, sat1))
+    return sat1[order], sat2[order], steps[order], distances[order]
+
+def _screen_steps(positions, errors, find_pairs):
+    """Screens each time step with ``find_pairs(points, valid)`` and merges the hits.
+
+    ``valid`` holds the satellite indices without an SGP4 error at the step
+    and ``points`` their positions; ``find_pairs`` returns ``(i, j,
+    distance)`` indexing into them.
+    """
+    results = []
+    for t in range(positions.shape[1]):
+        valid = np.flatnonzero(errors[:, t] == 0)
+        i, j, distance = find_pairs(positions[valid, t], valid)
+        if len(distance):
+            results.append((valid[i], valid[j], np.full(len(distance), t, dtype=np.int64), distance))
+    return merge_hits(results)
+
+def conjunction_arrays(positions, errors, threshold, keep=None):
+    """Screens dense batch positions for close approaches at every time step.
+
+    ``positions`` is an ``(n_sats, n_steps, 3)`` array and ``errors`` the
+    matching SGP4 error codes; samples with a non-zero code are skipped.
+    ``keep`` maps satellite index arrays ``(i, j)`` to a mask of the pairs
+    worth screening (e.g. ``prefilter.PairFilter``); the others are never
+    measured or returned. Returns ``(sat1, sat2, time_step, distance)``
+    arrays ordered like the brute-force ``check_collisions`` loop (by sat1,
+    then sat2, then step).
+    """
+    return _screen_steps(
+        positions, errors,
+        lambda points, valid: pairs_within(points, threshold, _keep_valid(keep, valid)),
+    )
+
+def screen_conjunctions(positions, errors, threshold):
+    """Grid-indexed replacement for ``check_collisions`` on batch arrays.
+
+    Returns the same list of collision records as the brute-force path so
+    the two can be compared directly.
+    """
+    sat1, sat2, steps, distances = conjunction_arrays(positions, errors, threshold)
+    return [
+        {"sat1": i, "sat2": j, "time_step": t, "distance": d}
+        for i, j, t, d in zip(sat1.tolist(), sat2.tolist(), steps.tolist(), distances.tolist())
+    ]
+
+def conjunction_arrays_for(positions, errors, threshold, subset, keep=None):
+    """Like ``conjunction_arrays`` but only for pairs involving a satellite in ``subset``.
+
+    Used to re-screen after a few objects change without repeating the
+    all-pairs search. Returns arrays in the same order as ``conjunction_arrays``.
+    """
+    in_subset = np.zeros(positions.shape[0], dtype=bool)
+    in_subset[np.asarray(subset, dtype=np.int64)] = True
+    return _screen_steps(
+        positions, errors,
+        lambda points, valid: pairs_near(
+            points, np.flatnonzero(in_subset[valid]), threshold, _keep_valid(keep, valid)
+        ),
+    )
@@ -1,23 +1,207 @@
 # src/spacetrack_fetcher.py
 
+import atexit
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from itertools import chain
 import requests
-from src.config import SPACE_TRACK_URL, SPACE_TRACK_USER, SPACE_TRACK_PASSWORD
-
-def get_spacetrack_data(norad_ids):
-    """Fetches TLE data from space-track.org for a list of NORAD IDs."""
-    login_url = f"{SPACE_TRACK_URL}/ajaxauth/login"
-    query_url = f"{SPACE_TRACK_URL}/basicspacedata/query/class/gp/NORAD_CAT_ID/{','.join(map(str, norad_ids))}/orderby/ORDINAL asc/format/3le"
-
-    with requests.Session() as session:
-        # Login to space-track.org
-        login_data = {"identity": SPACE_TRACK_USER, "password": SPACE_TRACK_PASSWORD}
-        resp = session.post(login_url, data=login_data)
-        if resp.status_code != 200:
-            raise Exception(f"Failed to login to space-track.org: {resp.text}")
-
-        # Fetch TLE data
-        resp = session.get(query_url)
-        if resp.status_code != 200:
-            raise Exception(f"Failed to fetch TLE data: {resp.text}")
-
-        return resp.text
+from requests.adapters import HTTPAdapter
+from src.config import (
+    SPACE_TRACK_URL,
+    SPACE_TRACK_USER,
+    SPACE_TRACK_PASSWORD,
+    QUERY_CHUNK_SIZE,
+    QUERY_CONCURRENCY,
+    QUERY_RATE_LIMITS,
+    QUERY_MAX_RETRIES,
+    QUERY_BACKOFF,
+)
+from src.tle_parser import iter_lines
+
+def build_query_url(norad_ids, base_url=SPACE_TRACK_URL, epoch_after=None):
+    """Builds the gp 3LE query URL, optionally limited to epochs after a datetime."""
+    predicates = f"NORAD_CAT_ID/{','.join(map(str, norad_ids))}"
+    if epoch_after is not None:
+        predicates += f"/EPOCH/>{epoch_after.strftime('%Y-%m-%d %H:%M:%S')}"
+    return f"{base_url}/basicspacedata/query/class/gp/{predicates}/orderby/ORDINAL asc/format/3le"
+
+class RateLimiter:
+    """Blocks callers so that no more than N requests start in any window of T seconds."""
+
+    def __init__(self, limits=QUERY_RATE_LIMITS):
+        self.limits = [(count, period, deque()) for count, period in limits]
+        self.lock = threading.Lock()
+
+    def wait(self):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                delay = 0.0
+                for count, period, starts in self.limits:
+                    while starts and now - starts[0] >= period:
+                        starts.popleft()
+                    if len(starts) >= count:
+                        delay = max(delay, period - (now - starts[0]))
+                if delay <= 0:
+                    for _, _, starts in self.limits:
+                        starts.append(now)
+                    return
+            time.sleep(delay)
+
+# Space-Track quotas are per account, so every client in the process shares one limiter.
+_RATE_LIMITER = RateLimiter()
+
+class SpaceTrackClient:
+    """Authenticated, pooled Space-Track session that queries large ID lists in chunks.
+
+    ID lists are split into ``chunk_size`` requests so query URLs stay short,
+    and up to ``concurrency`` chunks are in flight at once over one logged-in
+    session. Every request goes through the process-wide ``RateLimiter``
+    unless one is passed in; throttled (429) and server-error responses and
+    connection failures are retried with exponential backoff, and an
+    expired session (401) triggers a single re-login.
+    """
+
+    def __init__(self, base_url=SPACE_TRACK_URL, user=SPACE_TRACK_USER,
+                 password=SPACE_TRACK_PASSWORD, chunk_size=QUERY_CHUNK_SIZE,
+                 concurrency=QUERY_CONCURRENCY, rate_limiter=None,
+                 max_retries=QUERY_MAX_RETRIES, backoff=QUERY_BACKOFF):
+        self.base_url = base_url
+        self.credentials = {"identity": user, "password": password}
+        self.chunk_size = chunk_size
+        self.concurrency = concurrency
+        self.rate_limiter = rate_limiter or _RATE_LIMITER
+        self.max_retries = max_retries
+        self.backoff = backoff
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=concurrency)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self._login_lock = threading.Lock()
+        self._logged_in = False
+
+    def login(self, force=False):
+        with self._login_lock:
+            if self._logged_in and not force:
+                return
+            self.rate_limiter.wait()
+            resp = self.session.post(f"{self.base_url}/ajaxauth/login", data=self.credentials)
+            if resp.status_code != 200:
+                raise Exception(f"Failed to login to space-track.org: {resp.text}")
+            self._logged_in = True
+
+    def _get(self, url):
+        """GETs ``url`` under the rate limit, retrying throttled or failed requests."""
+        self.login()
+        relogged = False
+        failure = "no attempts made"
+        for attempt in range(self.max_retries):
+            self.rate_limiter.wait()
+            try:
+                resp = self.session.get(url)
+            except (requests.ConnectionError, requests.Timeout) as error:
+                failure = str(error)
+                time.sleep(self.backoff * 2**attempt)
+                continue
+            failure = f"{resp.status_code} {resp.text}"
+            if resp.status_code == 200:
+                return resp.text
+            if resp.status_code == 401 and not relogged:
+                self.login(force=True)
+                relogged = True
+                continue
+            if resp.status_code == 429 or resp.status_code >= 500:
+                retry_after = resp.headers.get("Retry-After", "")
+                delay = float(retry_after) if retry_after.isdigit() else self.backoff * 2**attempt
+                time.sleep(delay)
+                continue
+            break
+        raise Exception(f"Failed to fetch TLE data: {failure}")
+
+    def chunks(self, norad_ids):
+        ids = list(norad_ids)
+        return [ids[lo:lo + self.chunk_size] for lo in range(0, len(ids), self.chunk_size)]
+
+    def iter_chunks(self, norad_ids, epoch_after=None, max_pending=None):
+        """Yields ``(chunk_index, 3le_text)`` as each chunk's response arrives.
+
+        Chunks complete in any order, so callers can start parsing the first
+        response while later ones are still downloading. At most
+        ``max_pending`` (default ``concurrency``) requests are submitted
+        ahead of the caller, and a new one is only submitted once the caller
+        has taken a response, so a consumer that stops pulling also stops
+        the downloads.
+        """
+        chunks = self.chunks(norad_ids)
+        if not chunks:
+            return
+        max_pending = max_pending or self.concurrency
+        self.login()
+        pool = ThreadPoolExecutor(max_workers=self.concurrency)
+        pending = {}
+        submitted = 0
+        try:
+            while submitted < len(chunks) or pending:
+                while submitted < len(chunks) and len(pending) < max_pending:
+                    url = build_query_url(chunks[submitted], self.base_url, epoch_after)
+                    pending[pool.submit(self._get, url)] = submitted
+                    submitted += 1
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield pending.pop(future), future.result()
+        finally:
+            pool.shutdown(cancel_futures=True)
+
+    def fetch(self, norad_ids, epoch_after=None):
+        """Downloads all IDs and returns an iterator over the 3LE lines, chunk by chunk in request order.
+
+        The responses are not joined into one text; each is dropped once
+        its lines have been read.
+        """
+        texts = dict(self.iter_chunks(norad_ids, epoch_after))
+        return chain.from_iterable(iter_lines(texts.pop(index)) for index in sorted(texts))
+
+    def close(self):
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+def get_client(base_url=SPACE_TRACK_URL):
+    """Returns the process-wide client for ``base_url``, logging in on first use.
+
+    Reusing one client keeps a single session and login across calls, and
+    all of them share the rate limiter, so the quotas hold for the daemon
+    and for repeated refreshes alike.
+    """
+    with _clients_lock:
+        if base_url not in _clients:
+            _clients[base_url] = SpaceTrackClient(base_url)
+        return _clients[base_url]
+
+@atexit.register
+def close_clients():
+    with _clients_lock:
+        for client in _clients.values():
+            client.close()
+        _clients.clear()
+
+def get_spacetrack_data(norad_ids, base_url=SPACE_TRACK_URL, epoch_after=None, client=None):
+    """Fetches TLE data from space-track.org for a list of NORAD IDs.
+
+    Uses the shared client for ``base_url`` unless ``client`` is given.
+    ``base_url`` can point at a local stub server for testing, and
+    ``epoch_after`` limits the response to element sets newer than it.
+    Returns an iterator over the 3LE lines.
+    """
+    client = client or get_client(base_url)
+    return client.fetch(norad_ids, epoch_after)
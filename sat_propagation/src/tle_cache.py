@@ -0,0 +1,173 @@
+# src/tle_cache.py
+
+import sqlite3
+import time
+from datetime import datetime, timedelta
+from src.config import TLE_CACHE_FILE, TLE_MAX_AGE, TLE_MISS_TTL, OFFLINE
+from src.spacetrack_fetcher import get_spacetrack_data
+from src.tle_parser import iter_tle_records
+
+_ALPHA5 = "ABCDEFGHJKLMNPQRSTUVWXYZ"
+
+def norad_id(line1):
+    """Returns the catalog number from TLE line 1, decoding Alpha-5 numbers."""
+    field = line1[2:7].strip()
+    if field[:1].isalpha():
+        return (_ALPHA5.index(field[0].upper()) + 10) * 10000 + int(field[1:])
+    return int(field)
+
+def tle_epoch(line1):
+    """Returns the element-set epoch on TLE line 1 as a naive UTC datetime."""
+    year = int(line1[18:20])
+    year += 2000 if year < 57 else 1900
+    return datetime(year, 1, 1) + timedelta(days=float(line1[20:32]) - 1)
+
+def _epoch_key(line1):
+    """Returns the epoch as a fixed-width ISO string, so cached epochs compare as text."""
+    return tle_epoch(line1).isoformat(timespec="microseconds")
+
+class TLECache:
+    """SQLite-backed store of the latest element set per NORAD ID.
+
+    IDs that Space-Track returned nothing for are kept in a separate table
+    with the time they were asked for, so they are not re-requested on
+    every run.
+    """
+
+    def __init__(self, path=TLE_CACHE_FILE):
+        self.connection = sqlite3.connect(path)
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS tle ("
+            " norad_id INTEGER PRIMARY KEY,"
+            " name TEXT, line1 TEXT, line2 TEXT,"
+            " epoch TEXT, fetched_at REAL)"
+        )
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS missing ("
+            " norad_id INTEGER PRIMARY KEY, checked_at REAL)"
+        )
+
+    def get(self, norad_ids):
+        """Returns {norad_id: (name, line1, line2, epoch, fetched_at)} for the cached IDs."""
+        rows = {}
+        ids = list(norad_ids)
+        # Stay under SQLite's bound-parameter limit.
+        for lo in range(0, len(ids), 900):
+            chunk = ids[lo:lo + 900]
+            query = (
+                "SELECT norad_id, name, line1, line2, epoch, fetched_at FROM tle"
+                f" WHERE norad_id IN ({','.join('?' * len(chunk))})"
+            )
+            for row in self.connection.execute(query, chunk):
+                rows[row[0]] = row[1:]
+        return rows
+
+    def store(self, triplets, fetched_at):
+        """Inserts or replaces the given (name, line1, line2) element sets."""
+        rows = [
+            (norad_id(line1), name, line1, line2, _epoch_key(line1), fetched_at)
+            for name, line1, line2 in triplets
+        ]
+        with self.connection:
+            self.connection.executemany("INSERT OR REPLACE INTO tle VALUES (?, ?, ?, ?, ?, ?)", rows)
+            self.connection.executemany(
+                "DELETE FROM missing WHERE norad_id = ?", [(row[0],) for row in rows]
+            )
+
+    def recent_misses(self, since):
+        """Returns the IDs recorded as unknown to Space-Track at or after ``since``."""
+        rows = self.connection.execute(
+            "SELECT norad_id FROM missing WHERE checked_at >= ?", (since,)
+        )
+        return {row[0] for row in rows}
+
+    def record_misses(self, norad_ids, checked_at):
+        """Remembers IDs that a query returned no element set for."""
+        with self.connection:
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO missing VALUES (?, ?)",
+                [(norad_id, checked_at) for norad_id in norad_ids],
+            )
+
+    def touch(self, norad_ids, fetched_at):
+        """Marks cached element sets as checked against Space-Track at ``fetched_at``."""
+        with self.connection:
+            self.connection.executemany(
+                "UPDATE tle SET fetched_at = ? WHERE norad_id = ?",
+                [(fetched_at, norad_id) for norad_id in norad_ids],
+            )
+
+    def iter_3le(self, norad_ids):
+        """Returns an iterator over the cached element sets as 3LE lines, in the order of ``norad_ids``.
+
+        The rows are read up front, so the iterator stays valid after
+        ``close()``. Records stored without a name are written as 2LE, so
+        they read back with an empty name rather than as "0".
+        """
+        rows = self.get(norad_ids)
+        return _record_lines(rows[norad_id][:3] for norad_id in norad_ids if norad_id in rows)
+
+    def as_3le(self, norad_ids):
+        """Returns cached element sets as 3LE text in the order of ``norad_ids``."""
+        return "\r\n".join(self.iter_3le(norad_ids))
+
+    def close(self):
+        self.connection.close()
+
+def _record_lines(records):
+    for name, line1, line2 in records:
+        if name:
+            yield f"0 {name}"
+        yield line1
+        yield line2
+
+def refresh(cache, norad_ids, max_age=TLE_MAX_AGE, fetch=get_spacetrack_data, miss_ttl=TLE_MISS_TTL):
+    """Brings the cache up to date for ``norad_ids`` with as little downloading as possible.
+
+    IDs never seen before are fetched in full; those Space-Track returns
+    nothing for are not asked for again until ``miss_ttl`` hours have
+    passed. IDs checked more than ``max_age`` hours ago are re-queried only
+    for element sets with an epoch newer than the oldest one cached, and
+    only those whose epoch actually advanced are rewritten. Returns the
+    number of element sets updated.
+    """
+    now = time.time()
+    cached = cache.get(norad_ids)
+    known_missing = cache.recent_misses(now - miss_ttl * 3600.0)
+    missing = [i for i in norad_ids if i not in cached and i not in known_missing]
+    stale = [i for i in norad_ids if i in cached and now - cached[i][4] > max_age * 3600.0]
+
+    updates = []
+    if missing:
+        updates.extend(iter_tle_records(fetch(missing)))
+        returned = {norad_id(line1) for _, line1, _ in updates}
+        cache.record_misses([i for i in missing if i not in returned], now)
+    if stale:
+        since = min(cached[i][3] for i in stale)
+        response = fetch(stale, epoch_after=datetime.fromisoformat(since))
+        for name, line1, line2 in iter_tle_records(response):
+            previous = cached.get(norad_id(line1))
+            if previous is None or _epoch_key(line1) > previous[3]:
+                updates.append((name, line1, line2))
+
+    cache.store(updates, now)
+    cache.touch(stale, now)
+    return len(updates)
+
+def get_tle_data(norad_ids, cache_path=TLE_CACHE_FILE, max_age=TLE_MAX_AGE, offline=OFFLINE,
+                 fetch=get_spacetrack_data):
+    """Returns the 3LE lines for ``norad_ids``, refreshing the local cache first unless ``offline``.
+
+    The result is an iterator for ``parse_tle_stream``, not one joined text.
+
+    ``fetch`` defaults to the live Space-Track query; pass e.g.
+    ``functools.partial(get_spacetrack_data, base_url="http://127.0.0.1:8000")``
+    to run against a local stub server.
+    """
+    cache = TLECache(cache_path)
+    try:
+        if not offline:
+            refresh(cache, norad_ids, max_age, fetch)
+        return cache.iter_3le(norad_ids)
+    finally:
+        cache.close()
@@ -0,0 +1,191 @@
+# src/tle_parser.py
+
+import numpy as np
+from sgp4.api import Satrec
+from sgp4.exporter import export_tle
+
+class Satellite(Satrec):
+    """Satrec that also carries its name and source TLE lines.
+
+    The compiled ``Satrec`` type does not accept new attributes, so
+    ``satellite.name = ...`` only works on this subclass.
+    """
+
+def tle_lines(satellite):
+    """Returns the two TLE lines of a satellite, regenerating them if they were not kept."""
+    line1 = getattr(satellite, "line1", None)
+    if line1 is not None:
+        return line1, satellite.line2
+    return export_tle(satellite)
+
+_DIGITS = tuple((d, str(d)) for d in range(1, 10))
+
+def checksum_ok(line):
+    """Validates the modulo-10 checksum in column 69 of a TLE line."""
+    if len(line) < 69 or not line[68].isdigit():
+        return False
+    # Digits count their value and minus signs count one; counting each
+    # symbol with str.count is several times faster than a per-character loop.
+    body = line[:68]
+    total = body.count("-")
+    for value, digit in _DIGITS:
+        total += value * body.count(digit)
+    return total % 10 == int(line[68])
+
+def iter_lines(text):
+    """Yields the lines of ``text`` one at a time, without copying the whole body.
+
+    ``io.StringIO`` would first copy the text into its own (up to four
+    bytes per character) buffer; here only one line is sliced out at a
+    time. Line endings are left on, as ``iter_tle_records`` strips them.
+    """
+    start = 0
+    while start < len(text):
+        end = text.find("\n", start)
+        if end < 0:
+            yield text[start:]
+            return
+        yield text[start:end + 1]
+        start = end + 1
+
+def iter_tle_records(lines, skipped=None):
+    """Yields ``(name, line1, line2)`` from an iterable of 2LE or 3LE lines.
+
+    ``lines`` can be a file, a response line iterator or a list; it is read
+    one line at a time and both ``\\n`` and ``\\r\\n`` endings are accepted.
+    Records with a missing partner line, mismatched catalog numbers or a bad
+    checksum are dropped and, if ``skipped`` is a list, reported in it as
+    ``(line_number, reason)``. 2LE records get an empty name.
+    """
+    name = ""
+    line1 = None
+    line1_number = 0
+    for number, raw in enumerate(lines, start=1):
+        if isinstance(raw, bytes):
+            raw = raw.decode("ascii", "replace")
+        line = raw.strip()
+        if not line:
+            continue
+
+        if line.startswith("1 ") and len(line) >= 69:
+            if line1 is not None and skipped is not None:
+                skipped.append((line1_number, "line 1 without line 2"))
+            line1, line1_number = line, number
+            continue
+
+        if line.startswith("2 ") and len(line) >= 69:
+            if line1 is None:
+                if skipped is not None:
+                    skipped.append((number, "line 2 without line 1"))
+            elif line1[2:7] != line[2:7]:
+                if skipped is not None:
+                    skipped.append((line1_number, "catalog number mismatch"))
+            elif not (checksum_ok(line1) and checksum_ok(line)):
+                if skipped is not None:
+                    skipped.append((line1_number, "bad checksum"))
+            else:
+                yield name, line1, line
+            name, line1 = "", None
+            continue
+
+        # Anything else is a title line; strip the optional 3LE "0 " prefix.
+        if line1 is not None and skipped is not None:
+            skipped.append((line1_number, "line 1 without line 2"))
+        name = line[2:] if line.startswith("0 ") else line
+        line1 = None
+
+    if line1 is not None and skipped is not None:
+        skipped.append((line1_number, "line 1 without line 2"))
+
+class ElementTable:
+    """Columnar view of the mean elements of a parsed catalog.
+
+    Each attribute is a numpy array with one entry per satellite, in the same
+    order as the satellite list: ``norad_id``, ``epoch`` (Julian date),
+    ``mean_motion`` (rev/day), ``eccentricity``, ``inclination``, ``raan``,
+    ``arg_perigee``, ``mean_anomaly`` (radians), ``bstar``, and the
+    ``perigee``/``apogee`` altitudes (km).
+    """
+
+    FIELDS = (
+        ("norad_id", np.int64, lambda s: s.satnum),
+        ("epoch", np.float64, lambda s: s.jdsatepoch + s.jdsatepochF),
+        ("mean_motion", np.float64, lambda s: s.no_kozai * 1440.0 / (2.0 * np.pi)),
+        ("eccentricity", np.float64, lambda s: s.ecco),
+        ("inclination", np.float64, lambda s: s.inclo),
+        ("raan", np.float64, lambda s: s.nodeo),
+        ("arg_perigee", np.float64, lambda s: s.argpo),
+        ("mean_anomaly", np.float64, lambda s: s.mo),
+        ("bstar", np.float64, lambda s: s.bstar),
+        ("perigee", np.float64, lambda s: s.altp * s.radiusearthkm),
+        ("apogee", np.float64, lambda s: s.alta * s.radiusearthkm),
+    )
+
+    def __init__(self, satellites):
+        for field, dtype, getter in self.FIELDS:
+            column = np.fromiter((getter(s) for s in satellites), dtype=dtype, count=len(satellites))
+            setattr(self, field, column)
+
+    def __len__(self):
+        return len(self.norad_id)
+
+class SatelliteCache:
+    """Initialized satellites kept between parses, keyed by their two TLE lines.
+
+    Passing the same cache to successive ``parse_tle_stream`` calls hands
+    back the existing ``Satellite`` for every element set that has not
+    changed, so only new or updated records go through SGP4 initialization.
+    Entries not seen in the latest parse are evicted. ``hits`` and
+    ``misses`` count the records of the latest parse.
+    """
+
+    def __init__(self):
+        self.entries = {}
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+def _initialize(line1, line2):
+    satellite = Satellite.twoline2rv(line1, line2)
+    satellite.line1 = line1
+    satellite.line2 = line2
+    return satellite
+
+def parse_tle_stream(lines, cache=None):
+    """Parses a 2LE/3LE line stream into satellites, an element table and a report.
+
+    Returns ``(satellites, table, report)`` where ``satellites`` is a list of
+    ``Satellite`` objects, ``table`` an ``ElementTable`` in the same order and
+    ``report`` a dict with the number of ``records`` parsed and the
+    ``skipped`` ``(line_number, reason)`` entries. With a ``SatelliteCache``,
+    unchanged element sets reuse the satellites of the previous parse.
+    """
+    skipped = []
+    satellites = []
+    entries = {}
+    hits = 0
+    for name, line1, line2 in iter_tle_records(lines, skipped):
+        key = (line1, line2)
+        satellite = cache.entries.get(key) if cache is not None else None
+        if satellite is None:
+            satellite = _initialize(line1, line2)
+            if satellite.error != 0:
+                skipped.append((None, f"{line1[2:7].strip()}: sgp4 init error {satellite.error}"))
+                continue
+        else:
+            hits += 1
+        satellite.name = name or line1[2:7].strip()
+        entries[key] = satellite
+        satellites.append(satellite)
+
+    if cache is not None:
+        cache.entries = entries
+        cache.hits, cache.misses = hits, len(satellites) - hits
+    report = {"records": len(satellites), "skipped": skipped}
+    return satellites, ElementTable(satellites), report
+
+def parse_tle_text(tle_data, cache=None):
+    """Convenience wrapper over ``parse_tle_stream`` for an in-memory response body."""
+    return parse_tle_stream(iter_lines(tle_data), cache)
@@ -0,0 +1,38 @@
+# tests/conftest.py
+
+import pytest
+from benchmarks.synthetic_catalog import synthetic_tle
+from src.collision_analysis import covering_grid, propagate_satellites_batch
+from src.refinement import coarse_distance, refine_candidates
+from src.screening import conjunction_arrays
+from src.tle_parser import parse_tle_text
+
+THRESHOLD = 10.0  # km, the distance ``expected`` is computed at
+HOURS = 6.0
+
+@pytest.fixture(scope="session")
+def catalog():
+    # Dense enough that a few events sit between pairs whose mean-element
+    # altitude bands are more than the threshold apart.
+    satellites, _, _ = parse_tle_text(synthetic_tle(800, mix=(1.0, 0.0, 0.0), seed=1))
+    start_time = satellites[0].jdsatepoch + satellites[0].jdsatepochF
+    return satellites, start_time, start_time + HOURS / 24.0
+
+def brute_force(satellites, start_time, end_time, threshold, step_seconds=10.0):
+    """Screens every pair at every ``step_seconds`` sample, with no pruning, then refines."""
+    step_days = step_seconds / 86400.0
+    n_steps, grid_end = covering_grid(start_time, end_time, step_days)
+    errors, positions, _ = propagate_satellites_batch(satellites, start_time, grid_end, step_days)
+    sat1, sat2, steps, _ = conjunction_arrays(
+        positions, errors, coarse_distance(threshold, step_seconds)
+    )
+    return refine_candidates(
+        satellites, start_time, end_time - start_time, step_days, n_steps, sat1, sat2, steps, threshold
+    )
+
+@pytest.fixture(scope="session")
+def expected(catalog):
+    events = brute_force(*catalog, THRESHOLD)
+    assert len(events) > 100
+    return events
+
@@ -0,0 +1,46 @@
+# tests/test_catalog_stats.py
+# Run from the sat_propagation folder: python -m pytest tests
+
+import numpy as np
+import pytest
+from src.catalog_stats import catalog_statistics
+from src.metrics import Metrics
+
+THRESHOLDS = [2.0, 5.0, 10.0]  # km, the largest as in conftest.expected
+
+@pytest.fixture(scope="module")
+def stats(catalog):
+    return catalog_statistics(*catalog, THRESHOLDS, workers=1)
+
+def test_counts_match_brute_force(catalog, expected, stats):
+    satellites = catalog[0]
+    approaches = np.zeros((len(satellites), len(THRESHOLDS)), dtype=np.int64)
+    min_distance = np.full(len(satellites), np.inf)
+    for c in expected:
+        under = np.asarray(THRESHOLDS) > c["distance"]
+        for sat in (c["sat1"], c["sat2"]):
+            approaches[sat] += under
+            min_distance[sat] = min(min_distance[sat], c["distance"])
+
+    assert approaches[:, 0].sum() > 0
+    assert np.array_equal(stats.approaches, approaches)
+    assert np.allclose(stats.min_distance, min_distance, atol=0.01)
+    assert stats.band_encounters.sum(axis=0).tolist() == (approaches.sum(axis=0) // 2).tolist()
+
+def test_bands_and_summary(catalog, stats):
+    satellites, start_time, end_time = catalog
+    assert stats.days == pytest.approx(end_time - start_time)
+    summary = stats.summary(satellites, top=5)
+    assert summary["thresholds"] == THRESHOLDS
+    assert len(summary["objects"]) == 5
+    assert all(band["altitude"][0] < 2500.0 for band in summary["bands"])
+    assert sum(band["encounters"][-1] for band in summary["bands"]) == stats.band_encounters[:, -1].sum()
+
+def test_suspended_metrics_record_nothing(catalog, monkeypatch):
+    recorder = Metrics(enabled=True)
+    monkeypatch.setattr("src.refinement.metrics", recorder)
+    with recorder.stage("statistics"), recorder.suspended():
+        catalog_statistics(*catalog, THRESHOLDS, window=1.0, workers=1)
+    assert list(recorder.stages) == ["statistics"]
+    assert recorder.counters == {}
+    assert recorder.enabled
@@ -0,0 +1,52 @@
+# tests/test_daemon.py
+# Run from the sat_propagation folder: python -m pytest tests
+
+import src.daemon
+from benchmarks.synthetic_catalog import synthetic_tle
+from src.daemon import ScreeningService
+from src.tle_parser import parse_tle_text
+
+THRESHOLD = 10.0  # km
+
+def small_catalog(n, seed, epoch=25000.0):
+    satellites, _, _ = parse_tle_text(synthetic_tle(n, mix=(1.0, 0.0, 0.0), epoch=epoch, seed=seed))
+    return satellites, satellites[0].jdsatepoch + satellites[0].jdsatepochF
+
+def events(conjunctions, satellites):
+    return sorted(
+        (satellites[c["sat1"]].satnum, satellites[c["sat2"]].satnum, round(c["tca"] * 86400.0))
+        for c in conjunctions
+    )
+
+def test_snapshot_during_rebuild_sees_the_old_state(monkeypatch):
+    satellites, start_time = small_catalog(300, 4)
+    service = ScreeningService(satellites, start_time, start_time + 0.1, THRESHOLD)
+    before = service.snapshot()
+    assert before["conjunctions"]
+
+    seen = []
+    propagate = src.daemon.propagate_satellites_batch
+    def propagate_and_look(*args):
+        seen.append(service.snapshot())
+        return propagate(*args)
+    monkeypatch.setattr(src.daemon, "propagate_satellites_batch", propagate_and_look)
+
+    # A smaller catalog: old conjunction indices would be out of range.
+    service.rebuild(satellites[:100], start_time + 0.05, start_time + 0.15)
+    assert seen == [before]
+    after = service.snapshot()
+    assert after["window"] == [start_time + 0.05, start_time + 0.15]
+    assert after["objects"] == 100
+
+def test_update_matches_rebuild():
+    satellites, start_time = small_catalog(300, 5)
+    service = ScreeningService(satellites[:250], start_time, start_time + 0.1, THRESHOLD)
+    # New objects, plus a few existing ones with the same elements at a
+    # later epoch, which moves them along their orbits.
+    later, _ = small_catalog(300, 5, epoch=25000.01)
+    refreshed = later[:5] + satellites[5:]
+
+    assert service.update(refreshed) == 55
+    fresh = ScreeningService(refreshed, start_time, start_time + 0.1, THRESHOLD)
+    assert fresh.conjunctions
+    assert events(service.conjunctions, service.satellites) == events(fresh.conjunctions, fresh.satellites)
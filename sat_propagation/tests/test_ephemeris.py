@@ -0,0 +1,45 @@
+# tests/test_ephemeris.py
+# Run from the sat_propagation folder: python -m pytest tests
+
+import pytest
+import src.main
+from benchmarks.synthetic_catalog import synthetic_tle
+from src.main import load_ephemeris
+from src.refinement import find_conjunctions, find_conjunctions_in_store, screening_step
+from src.tle_parser import parse_tle_text
+
+def events(conjunctions):
+    return sorted((c["sat1"], c["sat2"], round(c["tca"] * 86400.0)) for c in conjunctions)
+
+def test_later_run_with_other_threshold_reuses_store(tmp_path, monkeypatch):
+    satellites, _, _ = parse_tle_text(synthetic_tle(300, mix=(1.0, 0.0, 0.0), seed=3))
+    start_time = satellites[0].jdsatepoch + satellites[0].jdsatepochF
+    path = str(tmp_path / "ephemeris.bin")
+    monkeypatch.setattr(src.main, "EPHEMERIS_DTYPE", "float64")
+    writes = []
+    write_ephemeris = src.main.write_ephemeris
+    monkeypatch.setattr(src.main, "write_ephemeris", lambda *args: writes.append(args) or write_ephemeris(*args))
+
+    def run(start, threshold):
+        end = start + 0.125
+        store, screen_start, screen_end = load_ephemeris(
+            satellites, start, end, screening_step(threshold), path, slack=0.05
+        )
+        return (screen_start, screen_end), find_conjunctions_in_store(
+            satellites, store, threshold, start_time=screen_start, end_time=screen_end
+        )
+
+    run(start_time, 1.0)
+    # One minute later, at a threshold with a different screening step.
+    window, found = run(start_time + 1.0 / 1440.0, 10.0)
+    assert len(writes) == 1
+    assert window == (start_time + 1.0 / 1440.0, start_time + 0.125 + 1.0 / 1440.0)
+    assert len(found) > 0
+    assert events(found) == events(find_conjunctions(satellites, *window, 10.0, workers=1))
+
+    # Past the slack only the stored part is screened; beyond it, the store is rewritten.
+    window, _ = run(start_time + 0.09, 10.0)
+    assert len(writes) == 1
+    assert window[1] == pytest.approx(start_time + 0.175)
+    run(start_time + 0.2, 10.0)
+    assert len(writes) == 2
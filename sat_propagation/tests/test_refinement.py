@@ -0,0 +1,41 @@
+# tests/test_refinement.py
+# Run from the sat_propagation folder: python -m pytest tests
+
+import pytest
+from src.config import PREFILTER_MARGIN
+from src.prefilter import prefilter_pairs
+from src.refinement import find_conjunctions, iter_conjunctions
+
+THRESHOLD = 10.0  # km, as in conftest.expected
+
+def assert_same_events(found, expected, seconds=1.0):
+    """Every event must match one of the other list by pair, TCA and miss distance."""
+    def by_pair(events):
+        grouped = {}
+        for c in events:
+            grouped.setdefault((c["sat1"], c["sat2"]), []).append(c)
+        return grouped
+
+    found, expected = by_pair(found), by_pair(expected)
+    assert sorted(found) == sorted(expected)
+    for pair, events in expected.items():
+        assert len(found[pair]) == len(events), pair
+        for a, b in zip(sorted(found[pair], key=lambda c: c["tca"]), sorted(events, key=lambda c: c["tca"])):
+            assert abs(a["tca"] - b["tca"]) * 86400.0 < seconds, pair
+            assert a["distance"] == pytest.approx(b["distance"], abs=0.01), pair
+
+def test_find_conjunctions_matches_brute_force(catalog, expected):
+    assert_same_events(find_conjunctions(*catalog, THRESHOLD, workers=1), expected)
+
+def test_prefiltered_search_matches_brute_force(catalog, expected):
+    satellites, start_time, end_time = catalog
+    i, j, _ = prefilter_pairs(satellites, THRESHOLD, PREFILTER_MARGIN)
+    found = find_conjunctions(satellites, start_time, end_time, THRESHOLD, pairs=(i, j), workers=1)
+    assert_same_events(found, expected)
+
+def test_windowed_search_matches_brute_force(catalog, expected):
+    found = list(iter_conjunctions(*catalog, THRESHOLD, window=1.0, workers=1))
+    assert_same_events(found, expected)
+
+def test_parallel_search_matches_brute_force(catalog, expected):
+    assert_same_events(find_conjunctions(*catalog, THRESHOLD, workers=2), expected)
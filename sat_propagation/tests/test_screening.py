@@ -0,0 +1,87 @@
+# tests/test_screening.py
+# Run from the sat_propagation folder: python -m pytest tests
+
+import numpy as np
+from benchmarks.synthetic_catalog import synthetic_tle
+from src.collision_analysis import check_collisions, positions_to_lists, propagate_satellites_batch
+from src.prefilter import BandFilter, PairFilter
+from src.screening import (
+    conjunction_arrays,
+    conjunction_arrays_for,
+    pairs_near,
+    pairs_within,
+    screen_conjunctions,
+)
+from src.tle_parser import parse_tle_text
+
+def brute_force_pairs(points, threshold):
+    i, j = np.triu_indices(len(points), k=1)
+    distance = np.linalg.norm(points[i] - points[j], axis=1)
+    close = distance < threshold
+    return set(zip(i[close].tolist(), j[close].tolist()))
+
+def test_pairs_within_matches_brute_force():
+    points = np.random.default_rng(0).uniform(-50.0, 50.0, (400, 3))
+    i, j, distance = pairs_within(points, 8.0)
+    assert set(zip(i.tolist(), j.tolist())) == brute_force_pairs(points, 8.0)
+    assert np.allclose(distance, np.linalg.norm(points[i] - points[j], axis=1))
+
+def test_pairs_near_matches_brute_force():
+    points = np.random.default_rng(1).uniform(-50.0, 50.0, (400, 3))
+    query = np.array([3, 17, 250])
+    i, j, _ = pairs_near(points, query, 8.0)
+    expected = {pair for pair in brute_force_pairs(points, 8.0) if set(pair) & set(query.tolist())}
+    assert set(zip(i.tolist(), j.tolist())) == expected
+
+def test_keep_filters_before_screening():
+    rng = np.random.default_rng(2)
+    positions = rng.uniform(-50.0, 50.0, (200, 6, 3))
+    errors = np.zeros((200, 6), dtype=np.uint8)
+    errors[7, 2] = 1
+    sat1, sat2, steps, distances = conjunction_arrays(positions, errors, 10.0)
+
+    allowed = sorted({(a, b) for a, b in zip(sat1.tolist(), sat2.tolist()) if (a + b) % 3 == 0})
+    keep = PairFilter(200, np.array([a for a, _ in allowed]), np.array([b for _, b in allowed]))
+    calls = []
+    def counting(i, j):
+        calls.append(len(i))
+        return keep(i, j)
+
+    kept = conjunction_arrays(positions, errors, 10.0, counting)
+    mask = (sat1 + sat2) % 3 == 0
+    for filtered, full in zip(kept, (sat1, sat2, steps, distances)):
+        assert np.array_equal(filtered, full[mask])
+    assert len(calls) == positions.shape[1]
+
+    subset = np.array([5, 40, 41])
+    kept = conjunction_arrays_for(positions, errors, 10.0, subset, keep)
+    full = conjunction_arrays_for(positions, errors, 10.0, subset)
+    mask = (full[0] + full[1]) % 3 == 0
+    assert all(np.array_equal(a, b[mask]) for a, b in zip(kept, full))
+
+def test_band_filter():
+    perigee = np.array([500.0, 520.0, 700.0])
+    apogee = np.array([510.0, 530.0, 720.0])
+    keep = BandFilter(perigee, apogee, 15.0)
+    assert keep(np.array([0, 0, 1]), np.array([1, 2, 2])).tolist() == [True, False, False]
+    assert keep(np.array([1]), np.array([0])).tolist() == [True]
+
+def test_screen_conjunctions_matches_check_collisions():
+    # LEO and MEO objects, with one forced propagation error to skip.
+    satellites, _, _ = parse_tle_text(synthetic_tle(60, mix=(0.8, 0.2, 0.0), seed=8))
+    start_time = satellites[0].jdsatepoch + satellites[0].jdsatepochF
+    errors, positions, _ = propagate_satellites_batch(satellites, start_time, start_time + 0.25, 1.0 / 1440.0)
+    errors[3, 10] = 1
+
+    expected = check_collisions(positions_to_lists(errors, positions), 500.0)
+    found = screen_conjunctions(positions, errors, 500.0)
+    assert len(expected) > 100
+    assert [(c["sat1"], c["sat2"], c["time_step"]) for c in found] == [
+        (c["sat1"], c["sat2"], c["time_step"]) for c in expected
+    ]
+    assert np.allclose([c["distance"] for c in found], [c["distance"] for c in expected])
+
+    sat1, sat2, steps, distances = conjunction_arrays(positions, errors, 500.0)
+    assert [(c["sat1"], c["sat2"], c["time_step"]) for c in expected] == list(
+        zip(sat1.tolist(), sat2.tolist(), steps.tolist())
+    )
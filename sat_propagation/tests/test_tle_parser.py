@@ -0,0 +1,47 @@
+# tests/test_tle_parser.py
+# Run from the sat_propagation folder: python -m pytest tests
+
+import tracemalloc
+from benchmarks.synthetic_catalog import synthetic_tle
+from src.tle_cache import get_tle_data
+from src.tle_parser import iter_lines, iter_tle_records, parse_tle_stream, parse_tle_text
+
+def test_iter_lines_matches_splitlines():
+    for text in ("", "a", "a\n", "a\r\nb", "\n\nx\r\n", synthetic_tle(20, seed=1)):
+        assert list(iter_lines(text)) == text.splitlines(keepends=True)
+
+def test_iter_lines_does_not_copy_the_body():
+    text = synthetic_tle(5000, seed=2)
+    tracemalloc.start()
+    try:
+        count = sum(1 for _ in iter_lines(text))
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    assert count == 15000
+    assert peak < len(text) // 100
+
+def test_parse_tle_text_reads_2le_and_3le():
+    text = synthetic_tle(50, seed=3)
+    lines = text.splitlines()
+    # Drop one name line to mix in a 2LE record.
+    satellites, _, report = parse_tle_text("\n".join(lines[:3] + lines[4:]))
+    assert report == {"records": 50, "skipped": []}
+    assert satellites[1].name == lines[4][2:7].strip()
+    assert [s.name for s in satellites[2:]] == [line[2:] for line in lines[6::3]]
+
+def test_get_tle_data_hands_over_lines(tmp_path):
+    text = synthetic_tle(30, seed=4)
+    records = list(iter_tle_records(iter_lines(text)))
+    ids = [int(line1[2:7]) for _, line1, _ in records]
+    calls = []
+    def fetch(norad_ids, epoch_after=None):
+        calls.append(norad_ids)
+        return iter_lines(text)
+
+    lines = get_tle_data(ids, cache_path=str(tmp_path / "tle.sqlite"), offline=False, fetch=fetch)
+    assert not isinstance(lines, str)
+    satellites, _, report = parse_tle_stream(lines)
+    assert calls == [ids]
+    assert report["records"] == 30
+    assert [(s.name, s.line1, s.line2) for s in satellites] == records